@@ -0,0 +1,163 @@
+import collections
+import functools
+import itertools
+
+import sudoku
+from sudoku import Sudoku
+
+
+class Result(collections.namedtuple('Result', ['index', 'solution', 'error'])):
+    """Outcome of solving one board of a batch.
+
+    index is the position of the board in the input. solution is the solved Sudoku, None if the
+    board couldn't be solved, in which case error is the exception explaining why.
+    """
+    __slots__ = ()
+
+
+class NoSolution(Exception):
+    pass
+
+
+class SearchStopped(Exception):
+    pass
+
+
+def solve_batch(boards, solver=sudoku.solve, processes=None, chunksize=1, ordered=True):
+    """Solve boards in a pool of worker processes and generate a Result for each of them.
+
+    The boards can be any iterable of nested lists or Sudoku instances, read as the workers need
+    them. The solver is called with a Sudoku instance in the workers and must therefore be
+    picklable: a module level function, like sudoku.solve or dlx.solve, or a functools.partial of
+    one.
+
+    processes is the number of workers, the number of CPUs by default. With 1, the boards are
+    solved in the current process. chunksize is the number of boards sent to a worker at once.
+    The results are generated in the order of the boards if ordered is True, in the order in which
+    they are solved otherwise.
+
+    An error raised while solving a board, like MalformedBoard, is reported in its result and
+    doesn't interrupt the batch. A solver stopping before the end of its search, like sudoku.solve()
+    given a timeout, is reported as a SearchStopped error whose message is the reason.
+    """
+    tasks = ((index, solver, encode(board)) for index, board in enumerate(boards))
+
+    if processes == 1:
+        for result in (_solve_task(task) for task in tasks):
+            yield _decode_result(result)
+        return
+
+    for result in _imap(_solve_task, tasks, processes, chunksize, ordered):
+        yield _decode_result(result)
+
+
+def _imap(function, tasks, processes=None, chunksize=1, ordered=True):
+    """Generate the results of function for each task of an iterable, in a pool of processes
+    workers, the number of CPUs by default.
+
+    The tasks are sent chunksize at a time. A new chunk is given to the pool as soon as one is done,
+    so that a slow task doesn't keep the other workers waiting, with at most four chunks per worker
+    in the pool at once: the tasks are read as the workers need them. The results are generated in
+    the order of the tasks if ordered is True, in which case the chunks done behind a slow one are
+    held back, up to four times as many. They are generated in the order in which they are computed
+    otherwise. The workers are stopped when the generator is closed.
+    """
+    # Imported only when a pool is used, as they are slow to import and the command line solves the
+    # puzzles in the current process by default
+    import multiprocessing
+    import queue
+
+    pool = multiprocessing.Pool(processes)
+    window = (processes or multiprocessing.cpu_count()) * 4
+    # Chunks given to the pool and not generated yet, by number in the order of the tasks, the
+    # numbers of the ones which are done, and the numbers put by the thread of the pool handling the
+    # results when they are done
+    pending = collections.OrderedDict()
+    finished = set()
+    done = queue.Queue()
+    try:
+        tasks = iter(tasks)
+        number = 0
+        while True:
+            while len(pending) - len(finished) < window and len(pending) < 4 * window:
+                chunk = list(itertools.islice(tasks, chunksize))
+                if not chunk:
+                    break
+                notify = functools.partial(_notify, done, number)
+                pending[number] = pool.apply_async(
+                    _run_chunk, ((function, chunk),), callback=notify, error_callback=notify,
+                )
+                number += 1
+            if not pending:
+                break
+
+            if ordered:
+                ready = next(iter(pending))
+            else:
+                ready = min(finished) if finished else None
+            if ready in finished:
+                finished.remove(ready)
+                for result in pending.pop(ready).get():
+                    yield result
+            else:
+                finished.add(done.get())
+        pool.close()
+    finally:
+        # Stop the workers right away if the caller stops consuming the results
+        pool.terminate()
+        pool.join()
+
+
+def _notify(done, number, _):
+    done.put(number)
+
+
+def _run_chunk(task):
+    function, chunk = task
+    return [function(item) for item in chunk]
+
+
+def encode(board):
+    """Return a compact representation of a board, cheap to send to another process.
+
+    The values of the cells are packed in a byte string, row after row, 0 standing for an empty
+    cell. The board is returned as a list of lists if it can't be packed, for instance because it is
+    malformed, so that the error is raised when the Sudoku is built.
+    """
+    if isinstance(board, Sudoku):
+        board = board.board
+    size = len(board)
+    values = [value or 0 for row in board for value in row]
+    if len(values) == size ** 2 and all(isinstance(v, int) and 0 <= v < 256 for v in values):
+        return size, bytes(bytearray(values))
+    return [list(row) for row in board]
+
+
+def decode(encoded):
+    """Return the board, as a list of lists, of a representation returned by encode()."""
+    if isinstance(encoded, list):
+        return encoded
+    size, data = encoded
+    values = bytearray(data)
+    return [[v or None for v in values[row * size:(row + 1) * size]] for row in range(size)]
+
+
+def _solve_task(task):
+    index, solver, encoded = task
+    try:
+        solution = solver(Sudoku(decode(encoded)))
+    except Exception as e:
+        return index, encoded, None, e
+    if solution is None:
+        return index, encoded, None, NoSolution('The board has no solution')
+    if isinstance(solution, sudoku.Interrupted):
+        return index, encoded, None, SearchStopped(solution.reason)
+    return index, encoded, encode(solution), None
+
+
+def _decode_result(result):
+    index, encoded, encoded_solution, error = result
+    if encoded_solution is None:
+        return Result(index, None, error)
+
+    return Result(index, Sudoku(decode(encoded)).filled(decode(encoded_solution)), None)
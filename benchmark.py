@@ -0,0 +1,295 @@
+import argparse
+import collections
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+import dlx
+import sudoku
+
+CORPUS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+DEFAULT_CORPORA = ('fixtures.txt', 'generated.txt')
+PERCENTILES = (50, 90, 99)
+
+
+def _backtracking(propagate=False, strategy_class=sudoku.RowMajor):
+    def run(puzzle):
+        stats = sudoku.SearchStats()
+        propagator = sudoku.Propagator() if propagate else None
+        return sudoku.solve(puzzle, propagator, strategy_class(), stats), stats.nodes
+    return run
+
+
+def _dlx(puzzle):
+    return dlx.solve(puzzle), None
+
+
+# Engines compared by the benchmark: functions returning the solution of a puzzle and the number
+# of nodes explored to find it (None if unknown)
+ENGINES = collections.OrderedDict([
+    ('backtracking', _backtracking()),
+    ('propagation', _backtracking(propagate=True)),
+    ('propagation-mrv', _backtracking(propagate=True, strategy_class=sudoku.MostConstrained)),
+    ('dlx', _dlx),
+])
+
+
+def read_corpus(path):
+    """Return the puzzles of a corpus file as (name, label, board) tuples.
+
+    The name of a puzzle is its file and line number, its label the last comment before it.
+    """
+    puzzles = []
+    label = None
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if line.startswith('#'):
+                label = line.lstrip('#').strip()
+                continue
+            board = sudoku.parse_puzzle(line)
+            if board is not None:
+                name = '{}:{}'.format(os.path.basename(path), number)
+                puzzles.append((name, label, board))
+    return puzzles
+
+
+def percentile(values, p):
+    """Return the p-th percentile of values, with the nearest-rank method."""
+    values = sorted(values)
+    return values[max(0, int(math.ceil(p / 100.0 * len(values))) - 1)]
+
+
+def run_benchmark(corpora, engines=None, repeat=1):
+    """Solve the puzzles of each corpus with each engine and return the report as a dict.
+
+    Each puzzle is solved repeat times, its fastest run is kept.
+    """
+    engines = engines or list(ENGINES)
+    report = {
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'results': [],
+    }
+
+    for path in corpora:
+        puzzles = read_corpus(path)
+        for engine in engines:
+            solver = ENGINES[engine]
+            per_puzzle = []
+            for name, label, board in puzzles:
+                puzzle = sudoku.Sudoku(board)
+                seconds = None
+                for _ in range(repeat):
+                    start = timeit.default_timer()
+                    solution, nodes = solver(puzzle)
+                    elapsed = timeit.default_timer() - start
+                    seconds = elapsed if seconds is None else min(seconds, elapsed)
+                per_puzzle.append({
+                    'name': name,
+                    'label': label,
+                    'seconds': seconds,
+                    'nodes': nodes,
+                    'solved': solution is not None,
+                })
+            report['results'].append(_summarize(os.path.basename(path), engine, per_puzzle))
+
+    return report
+
+
+def _summarize(corpus, engine, per_puzzle):
+    latencies = [p['seconds'] for p in per_puzzle]
+    total = sum(latencies)
+    nodes = [p['nodes'] for p in per_puzzle]
+    return {
+        'corpus': corpus,
+        'engine': engine,
+        'puzzles': len(per_puzzle),
+        'solved': sum(1 for p in per_puzzle if p['solved']),
+        'total_seconds': total,
+        'puzzles_per_second': len(per_puzzle) / total if total else None,
+        'latency': dict(
+            [('p{}'.format(p), percentile(latencies, p)) for p in PERCENTILES]
+            + [('mean', total / len(per_puzzle)), ('max', max(latencies))]
+        ) if per_puzzle else {},
+        'nodes': None if None in nodes else sum(nodes),
+        # Peak resident memory of the whole process so far, in kilobytes
+        'peak_rss_kb': _peak_rss_kb(),
+        'per_puzzle': per_puzzle,
+    }
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# Run by measure_startup() in a new interpreter, from the directory of the sudoku module
+_STARTUP_SCRIPT = '''
+import time
+start = time.perf_counter()
+import sudoku
+imported = time.perf_counter()
+sudoku.solve(sudoku.Sudoku(sudoku.parse_puzzle({line!r})))
+solved = time.perf_counter()
+print(imported - start, solved - imported)
+'''
+
+
+def measure_startup(board, repeat=5):
+    """Return the cold start latency of the solver as a dict, the fastest of repeat runs.
+
+    Each run starts a new interpreter which imports the sudoku module and solves the board with
+    solve(), as a short-lived command line invocation would. The times, in seconds, are:
+        - import_seconds: importing the sudoku module
+        - first_solve_seconds: building the Sudoku and solving it
+        - process_seconds: the whole process, from its start to its exit
+    """
+    script = _STARTUP_SCRIPT.format(line=sudoku.format_puzzle(board))
+    directory = os.path.dirname(os.path.abspath(sudoku.__file__))
+    startup = None
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=directory)
+        process_seconds = timeit.default_timer() - start
+        import_seconds, first_solve_seconds = [float(value) for value in output.split()]
+        if startup is None or process_seconds < startup['process_seconds']:
+            startup = {
+                'import_seconds': import_seconds,
+                'first_solve_seconds': first_solve_seconds,
+                'process_seconds': process_seconds,
+            }
+    return startup
+
+
+def compare(report, baseline, threshold):
+    """Return the regressions of a report compared to a baseline report, as messages.
+
+    A result regresses if its mean latency is more than threshold (0.1 for 10%) above the one of
+    the same engine on the same corpus in the baseline.
+    """
+    baseline_results = {(r['corpus'], r['engine']): r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        previous = baseline_results.get((result['corpus'], result['engine']))
+        if not previous or not previous['latency'] or not result['latency']:
+            continue
+        mean, previous_mean = result['latency']['mean'], previous['latency']['mean']
+        if mean > previous_mean * (1 + threshold):
+            regressions.append('{} on {}: mean latency {:.6f}s, {:+.1%} from {:.6f}s'.format(
+                result['engine'], result['corpus'], mean, mean / previous_mean - 1, previous_mean,
+            ))
+
+    if report.get('startup') and baseline.get('startup'):
+        cold_start = _cold_start_seconds(report['startup'])
+        previous_cold_start = _cold_start_seconds(baseline['startup'])
+        if cold_start > previous_cold_start * (1 + threshold):
+            regressions.append('import and first solve: {:.6f}s, {:+.1%} from {:.6f}s'.format(
+                cold_start, cold_start / previous_cold_start - 1, previous_cold_start,
+            ))
+    return regressions
+
+
+def _cold_start_seconds(startup):
+    return startup['import_seconds'] + startup['first_solve_seconds']
+
+
+def format_report(report):
+    """Return a human readable table of a report."""
+    row = '{:<16} {:<18} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}'
+    header = row.format(
+        'corpus', 'engine', 'solved', 'puzzles/s', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'nodes',
+    )
+    lines = [header, '-' * len(header)]
+    for r in report['results']:
+        latency = r['latency']
+        lines.append(row.format(
+            r['corpus'], r['engine'], '{}/{}'.format(r['solved'], r['puzzles']),
+            '{:.1f}'.format(r['puzzles_per_second'] or 0),
+            *['{:.3f}'.format(latency[key] * 1000) for key in ('p50', 'p90', 'p99', 'max')]
+            + ['-' if r['nodes'] is None else r['nodes']]
+        ))
+    if report['results'] and report['results'][0]['peak_rss_kb'] is not None:
+        lines.append('Peak RSS: {} kB'.format(max(r['peak_rss_kb'] for r in report['results'])))
+    startup = report.get('startup')
+    if startup:
+        lines.append('Startup: import {:.3f} ms, first solve {:.3f} ms, process {:.3f} ms'.format(
+            startup['import_seconds'] * 1000, startup['first_solve_seconds'] * 1000,
+            startup['process_seconds'] * 1000,
+        ))
+    return '\n'.join(lines)
+
+
+def main(argv=None, stdout=None, stderr=None):
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    parser = argparse.ArgumentParser(description='Benchmark the solver engines.')
+    parser.add_argument(
+        '--corpus', action='append',
+        help='file of puzzles in the one puzzle per line format, can be repeated '
+             '(default: the files of the corpus directory: {})'.format(', '.join(DEFAULT_CORPORA)),
+    )
+    parser.add_argument(
+        '--engine', action='append', choices=list(ENGINES),
+        help='engine to benchmark, can be repeated (default: all)',
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=1, help='runs per puzzle, the fastest one is kept'
+    )
+    parser.add_argument(
+        '--startup-runs', type=int, default=5,
+        help='new interpreters started to measure the latency of importing the sudoku module and '
+             'solving the first puzzle of the first corpus, the fastest one is kept, 0 to skip '
+             '(default: 5)',
+    )
+    parser.add_argument(
+        '--json', metavar='FILE', help='write the report as JSON to FILE, - for stdout'
+    )
+    parser.add_argument('--baseline', metavar='FILE', help='JSON report to compare with')
+    parser.add_argument(
+        '--threshold', type=float, default=0.25,
+        help='slowdown of the mean latencies, or of the import and first solve, compared to the '
+             'baseline, above which the benchmark fails (default: 0.25 for 25%%)',
+    )
+    args = parser.parse_args(argv)
+
+    corpora = args.corpus or [os.path.join(CORPUS_DIRECTORY, c) for c in DEFAULT_CORPORA]
+    report = run_benchmark(corpora, args.engine, args.repeat)
+    if args.startup_runs > 0:
+        puzzles = read_corpus(corpora[0])
+        if puzzles:
+            report['startup'] = measure_startup(puzzles[0][2], args.startup_runs)
+
+    text_output = stderr if args.json == '-' else stdout
+    text_output.write(format_report(report) + '\n')
+    if args.json == '-':
+        json.dump(report, stdout, indent=2, sort_keys=True)
+        stdout.write('\n')
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            text_output.write('Regression: {}\n'.format(regression))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+import collections
+import itertools
+import json
+import os
+
+import sudoku
+from sudoku import Sudoku
+
+# Maximum number of arrangements of the rows and columns compared by canonical_form()
+MAX_ARRANGEMENTS = 1024
+
+
+class Transformation(object):
+    """Transformation of a board preserving its solutions: an optional transposition, then an
+    order of the rows and of the columns, then a relabeling of the values.
+
+    rows and columns are the indexes, in the transposed board if transposed is True, of the rows
+    and columns of the transformed board. values maps each value to its new value.
+    """
+
+    def __init__(self, transposed, rows, columns, values):
+        self.transposed = transposed
+        self.rows = rows
+        self.columns = columns
+        self.values = values
+
+    def apply(self, board):
+        """Return the transformed board, as a list of lists."""
+        board = _transposed(board) if self.transposed else board
+        values = self.values
+        return [[values[board[r][c] or 0] or None for c in self.columns] for r in self.rows]
+
+    def revert(self, board):
+        """Return the board whose transformation is the given board, as a list of lists."""
+        size = len(board)
+        original_values = [0] * len(self.values)
+        for value, new_value in enumerate(self.values):
+            original_values[new_value] = value
+        original = [[None] * size for _ in range(size)]
+        for row, r in enumerate(self.rows):
+            for column, c in enumerate(self.columns):
+                original[r][c] = original_values[board[row][column] or 0] or None
+        return _transposed(original) if self.transposed else original
+
+
+def canonical_form(puzzle):
+    """Return the canonical board of a Sudoku, or a board, and the Transformation giving it.
+
+    Two boards which are the same up to a relabeling of the values, permutations of the rows within
+    their bands, of the bands, of the columns within their stacks, of the stacks and transposition
+    have the same canonical board.
+
+    The rows and columns are sorted by properties which don't depend on those transformations, only
+    the arrangements of the ones which can't be told apart that way are compared. When there are
+    more than MAX_ARRANGEMENTS of them, as for very symmetric boards, only the first ones are
+    compared: the canonical board is then still equivalent to the given one, but may differ from the
+    one of an equivalent board.
+    """
+    board = puzzle.board if isinstance(puzzle, Sudoku) else puzzle
+    board = [[v or 0 for v in row] for row in board]
+    size = len(board)
+    values_per_square = int(round(size ** 0.5))
+    value_counts = [0] * (size + 1)
+    for row in board:
+        for value in row:
+            value_counts[value] += 1
+    value_counts[0] = 0
+
+    best = None
+    for transposed, grid in ((False, board), (True, _transposed(board))):
+        rows = list(itertools.islice(
+            _orders(grid, values_per_square, value_counts), MAX_ARRANGEMENTS,
+        ))
+        columns = list(itertools.islice(
+            _orders(_transposed(grid), values_per_square, value_counts), MAX_ARRANGEMENTS,
+        ))
+        for row_order, column_order in itertools.islice(
+            itertools.product(rows, columns), MAX_ARRANGEMENTS,
+        ):
+            cells, values = _relabeled(grid, row_order, column_order, size)
+            if best is None or cells < best[0]:
+                best = cells, Transformation(transposed, row_order, column_order, values)
+
+    cells, transformation = best
+    canonical = [[v or None for v in cells[row * size:(row + 1) * size]] for row in range(size)]
+    return canonical, transformation
+
+
+def _transposed(board):
+    return [list(column) for column in zip(*board)]
+
+
+def _orders(grid, values_per_square, value_counts):
+    """Generate the orders of the rows of a grid sorted by band and row signatures, with the rows,
+    and bands, having the same signature in every possible order.
+    """
+    # The signature of a row is the same whatever the order of the columns and the values: the
+    # number of filled cells in each of its squares, and the number of times each of its values
+    # appears in the grid
+    signatures = []
+    for row in grid:
+        filled = [0] * values_per_square
+        for column, value in enumerate(row):
+            if value:
+                filled[column // values_per_square] += 1
+        signatures.append((sorted(filled), sorted(value_counts[value] for value in row if value)))
+
+    bands = [
+        range(band * values_per_square, (band + 1) * values_per_square)
+        for band in range(values_per_square)
+    ]
+    band_signatures = [sorted(signatures[r] for r in rows) for rows in bands]
+    band_orders = [list(_tie_orders(rows, signatures)) for rows in bands]
+    for bands_order in _tie_orders(range(values_per_square), band_signatures):
+        for rows in itertools.product(*[band_orders[b] for b in bands_order]):
+            yield [r for band in rows for r in band]
+
+
+def _tie_orders(items, signatures):
+    """Generate the orders of items sorted by signature, with the items of equal signature in every
+    possible order.
+    """
+    items = sorted(items, key=signatures.__getitem__)
+    ties = [list(group) for _, group in itertools.groupby(items, signatures.__getitem__)]
+    for orders in itertools.product(*[itertools.permutations(tie) for tie in ties]):
+        yield [item for order in orders for item in order]
+
+
+def _relabeled(grid, row_order, column_order, size):
+    """Return the cells of the arranged grid with the values relabeled in order of appearance, and
+    the relabeling.
+    """
+    values = [0] * (size + 1)
+    next_value = 1
+    cells = []
+    for r in row_order:
+        row = grid[r]
+        for c in column_order:
+            value = row[c]
+            if value and not values[value]:
+                values[value] = next_value
+                next_value += 1
+            cells.append(values[value])
+
+    # The values missing from the grid can take any of the labels left
+    for value in range(1, size + 1):
+        if not values[value]:
+            values[value] = next_value
+            next_value += 1
+    return cells, values
+
+
+class SolutionCache(object):
+    """Cache of the solutions of puzzles, shared by the puzzles having the same canonical form.
+
+    Up to maxsize solutions are kept, the least recently used one is evicted first. Puzzles missing
+    from the cache are solved by solver, sudoku.solve by default. Its results other than a Sudoku or
+    None, like Interrupted, are returned as is and not cached.
+
+    When a path is given, the cache is loaded from that file if it exists, and save() writes it
+    there.
+
+    hits, misses and evictions count the lookups found in the cache, the ones which weren't and the
+    solutions evicted to make room for new ones.
+    """
+
+    def __init__(self, maxsize=1024, solver=sudoku.solve, path=None):
+        self.maxsize = maxsize
+        self.solver = solver
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Canonical puzzles mapped to their canonical solution, or None if they have no solution,
+        # from the least to the most recently used
+        self._solutions = collections.OrderedDict()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._solutions)
+
+    def solve(self, puzzle):
+        """Return a new solved Sudoku instance. Return None if no solution exist."""
+        canonical, transformation = canonical_form(puzzle)
+        key = _key(canonical)
+        try:
+            solution = self._solutions.pop(key)
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._solutions[key] = solution
+            if solution is None:
+                return None
+            return puzzle.filled(transformation.revert(_board(solution)))
+
+        solution = self.solver(puzzle)
+        if solution is None:
+            self._store(key, None)
+        elif isinstance(solution, Sudoku):
+            self._store(key, _key(transformation.apply(solution.board)))
+        return solution
+
+    def clear(self):
+        """Remove all the solutions from the cache."""
+        self._solutions.clear()
+
+    def load(self, path):
+        """Add the solutions saved to a file by save() to the cache."""
+        with open(path) as f:
+            entries = json.load(f)
+        for puzzle, solution in entries:
+            self._store(_key(puzzle), None if solution is None else _key(solution))
+
+    def save(self, path=None):
+        """Write the solutions of the cache to a file, the path of the cache by default."""
+        path = path or self.path
+        entries = [
+            [_board(puzzle), None if solution is None else _board(solution)]
+            for puzzle, solution in self._solutions.items()
+        ]
+        # Write to another file first so that the cache file is never left half written
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(entries, f)
+        os.rename(temporary, path)
+
+    def _store(self, key, solution):
+        self._solutions.pop(key, None)
+        self._solutions[key] = solution
+        while len(self._solutions) > self.maxsize:
+            self._solutions.popitem(last=False)
+            self.evictions += 1
+
+
+def _key(board):
+    return bytes(bytearray(v or 0 for row in board for v in row))
+
+
+def _board(key):
+    values = bytearray(key)
+    size = int(round(len(values) ** 0.5))
+    return [[v or None for v in values[row * size:(row + 1) * size]] for row in range(size)]
@@ -0,0 +1,172 @@
+def solve(sudoku):
+    """Return a new solved Sudoku instance. Return None if no solution exist.
+
+    The Sudoku is solved as an exact cover problem with the Dancing Links algorithm.
+    """
+    for solution in solutions(sudoku):
+        return solution
+    return None
+
+
+def solutions(sudoku):
+    """Generate all the solutions of a Sudoku, as new Sudoku instances."""
+    links = _DancingLinks(sudoku)
+    for candidates in links.search():
+        solution = sudoku.copy()
+        for row, column, value in candidates:
+            if solution.modifiable(row, column):
+                solution.set_cell(row, column, value)
+        yield solution
+
+
+class _DancingLinks(object):
+    """Exact cover matrix of a Sudoku, stored as toroidal doubly linked lists.
+
+    Every column of the matrix is a constraint which must be satisfied exactly once:
+        - each cell contains a value
+        - each row contains each value
+        - each column contains each value
+        - each square contains each value
+
+    Every row of the matrix is a candidate (row, column, value) of the Sudoku, satisfying one
+    constraint of each kind. The cells containing a value only have one candidate.
+
+    The nodes are the indexes of flat lists holding their left, right, up, down and column
+    neighbours. Node 0 is the root, nodes 1 to 4 * n ** 2 are the column headers.
+    """
+
+    def __init__(self, sudoku):
+        n = sudoku.board_size
+        columns_count = 4 * n ** 2
+
+        # The headers are linked horizontally to the root, and vertically to themselves
+        self.left = [i - 1 for i in range(columns_count + 1)]
+        self.left[0] = columns_count
+        self.right = [i + 1 for i in range(columns_count + 1)]
+        self.right[columns_count] = 0
+        self.up = list(range(columns_count + 1))
+        self.down = list(range(columns_count + 1))
+        self.column = list(range(columns_count + 1))
+        # Number of nodes in each column
+        self.size = [0] * (columns_count + 1)
+        # Candidate of the matrix row of each node, None for the headers
+        self.candidate = [None] * (columns_count + 1)
+
+        for row in range(n):
+            for column in range(n):
+                value = sudoku.cell(row, column)
+                values = [value] if value else sorted(sudoku.possibilities(row, column))
+                square = sudoku.square_index(row, column)
+                for value in values:
+                    self._add_row((row, column, value), (
+                        1 + row * n + column,
+                        1 + n ** 2 + row * n + value - 1,
+                        1 + 2 * n ** 2 + column * n + value - 1,
+                        1 + 3 * n ** 2 + square * n + value - 1,
+                    ))
+
+    def _add_row(self, candidate, columns):
+        first = len(self.column)
+        for i, column in enumerate(columns):
+            node = first + i
+            self.left.append(node - 1 if i else first + len(columns) - 1)
+            self.right.append(node + 1 if i < len(columns) - 1 else first)
+            self.up.append(self.up[column])
+            self.down.append(column)
+            self.down[self.up[column]] = node
+            self.up[column] = node
+            self.column.append(column)
+            self.candidate.append(candidate)
+            self.size[column] += 1
+
+    def search(self):
+        """Generate the candidates of each exact cover of the matrix.
+
+        The search uses an explicit stack of the rows chosen at each level instead of recursion,
+        so that its depth isn't limited by the size of the board.
+        """
+        right, down, column = self.right, self.down, self.column
+        chosen = []
+
+        while True:
+            if right[0] == 0:
+                # All the constraints are satisfied
+                yield [self.candidate[node] for node in chosen]
+            else:
+                header = self._choose_column()
+                if self.size[header]:
+                    self._cover(header)
+                    chosen.append(down[header])
+                    self._cover_row(down[header])
+                    continue
+
+            # Backtrack to the last choice which has untried rows
+            while chosen:
+                node = chosen.pop()
+                header = column[node]
+                self._uncover_row(node)
+                node = down[node]
+                if node != header:
+                    chosen.append(node)
+                    self._cover_row(node)
+                    break
+                self._uncover(header)
+            else:
+                return
+
+    def _choose_column(self):
+        # The column with the fewest nodes gives the smallest branching factor
+        right, size = self.right, self.size
+        best = header = right[0]
+        while header:
+            if size[header] < size[best]:
+                best = header
+                if size[best] <= 1:
+                    break
+            header = right[header]
+        return best
+
+    def _cover(self, header):
+        left, right, up, down, column, size = (
+            self.left, self.right, self.up, self.down, self.column, self.size,
+        )
+        left[right[header]] = left[header]
+        right[left[header]] = right[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                up[down[j]] = up[j]
+                down[up[j]] = down[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, header):
+        left, right, up, down, column, size = (
+            self.left, self.right, self.up, self.down, self.column, self.size,
+        )
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                up[down[j]] = j
+                down[up[j]] = j
+                j = left[j]
+            i = up[i]
+        left[right[header]] = header
+        right[left[header]] = header
+
+    def _cover_row(self, node):
+        # Cover the other constraints satisfied by the candidate of the row
+        j = self.right[node]
+        while j != node:
+            self._cover(self.column[j])
+            j = self.right[j]
+
+    def _uncover_row(self, node):
+        j = self.left[node]
+        while j != node:
+            self._uncover(self.column[j])
+            j = self.left[j]
@@ -0,0 +1,142 @@
+import random
+
+import batch
+import sudoku
+from sudoku import Sudoku
+
+EASY = 'easy'
+MEDIUM = 'medium'
+HARD = 'hard'
+EXPERT = 'expert'
+DIFFICULTIES = (EASY, MEDIUM, HARD, EXPERT)
+
+# Deduction techniques which are enough to solve the puzzles of each difficulty. Expert puzzles
+# can't be solved without guessing.
+_TECHNIQUES = {
+    EASY: (sudoku.NAKED_SINGLES, sudoku.HIDDEN_SINGLES),
+    MEDIUM: (sudoku.NAKED_SINGLES, sudoku.HIDDEN_SINGLES, sudoku.NAKED_PAIRS, sudoku.HIDDEN_PAIRS),
+    HARD: sudoku.ALL_TECHNIQUES,
+}
+
+
+class GenerationFailed(Exception):
+    pass
+
+
+def grade(puzzle):
+    """Return the difficulty of a puzzle.
+
+    It is the first difficulty whose deduction techniques solve the puzzle, EXPERT if it can't be
+    solved without guessing.
+    """
+    for difficulty in (EASY, MEDIUM, HARD):
+        if _solved_by(puzzle, _TECHNIQUES[difficulty]):
+            return difficulty
+    return EXPERT
+
+
+def full_grid(board_size=9, rng=None):
+    """Return a random correct Sudoku of the given size."""
+    rng = rng or random.Random()
+    values_per_square = int(round(board_size ** 0.5))
+    strategy = _ShuffledValues(rng)
+
+    while True:
+        board = [[None] * board_size for _ in range(board_size)]
+        # The squares on the diagonal don't share any row or column: any permutation of the values
+        # can go in each of them
+        for square in range(values_per_square):
+            values = list(range(1, board_size + 1))
+            rng.shuffle(values)
+            for i, value in enumerate(values):
+                row, column = divmod(i, values_per_square)
+                board[square * values_per_square + row][square * values_per_square + column] = value
+
+        solution = sudoku.solve(Sudoku(board), sudoku.Propagator(_TECHNIQUES[EASY]), strategy)
+        if solution is not None:
+            return Sudoku(solution.board)
+
+
+def generate(board_size=9, difficulty=None, seed=None, attempts=100):
+    """Return a new puzzle, as a Sudoku instance, having a unique solution.
+
+    The clues of a random full grid are removed, in random order, as long as the puzzle keeps a
+    unique solution. When a difficulty is given, a clue is only removed if the puzzle can still be
+    solved with the deduction techniques of that difficulty, and grids are tried until one grades
+    as that difficulty, up to attempts times.
+
+    The same seed always generates the same puzzle.
+    """
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise ValueError('Unknown difficulty: {}'.format(difficulty))
+
+    rng = random.Random(seed)
+    for _ in range(attempts):
+        puzzle = _remove_clues(full_grid(board_size, rng), difficulty, rng)
+        if difficulty is None or grade(puzzle) == difficulty:
+            return puzzle
+
+    raise GenerationFailed('No {} puzzle generated in {} attempts'.format(difficulty, attempts))
+
+
+def generate_batch(count, board_size=9, difficulty=None, seed=None, processes=None, chunksize=1):
+    """Generate count puzzles in a pool of worker processes.
+
+    The puzzles are generated in the same order for a given seed, whatever the number of
+    processes. processes is the number of workers, the number of CPUs by default. With 1, the
+    puzzles are generated in the current process.
+    """
+    rng = random.Random(seed)
+    tasks = ((board_size, difficulty, rng.getrandbits(64)) for _ in range(count))
+
+    if processes == 1:
+        for task in tasks:
+            yield Sudoku(batch.decode(_generate_task(task)))
+        return
+
+    for encoded in batch._imap(_generate_task, tasks, processes, chunksize):
+        yield Sudoku(batch.decode(encoded))
+
+
+def _generate_task(task):
+    board_size, difficulty, seed = task
+    return batch.encode(generate(board_size, difficulty, seed))
+
+
+def _solved_by(puzzle, techniques):
+    return sudoku.Propagator(techniques).propagate(puzzle.copy()) == {}
+
+
+def _remove_clues(solution, difficulty, rng):
+    board = solution.board
+    cells = [(row, column) for row in range(len(board)) for column in range(len(board))]
+    rng.shuffle(cells)
+    propagator = sudoku.Propagator()
+    strategy = sudoku.MostConstrained()
+
+    for row, column in cells:
+        value = board[row][column]
+        board[row][column] = None
+        puzzle = Sudoku(board)
+        if difficulty in _TECHNIQUES:
+            # A puzzle solved by deduction has a unique solution
+            keep_removed = _solved_by(puzzle, _TECHNIQUES[difficulty])
+        else:
+            keep_removed = sudoku.has_unique_solution(puzzle, propagator, strategy)
+        if not keep_removed:
+            board[row][column] = value
+
+    return Sudoku(board)
+
+
+class _ShuffledValues(sudoku.MostConstrained):
+    """Search strategy trying the possibilities of the cells in random order."""
+
+    def __init__(self, rng):
+        super(_ShuffledValues, self).__init__()
+        self.rng = rng
+
+    def order_values(self, sudoku, candidates, row, column, possibilities):
+        possibilities = sorted(possibilities)
+        self.rng.shuffle(possibilities)
+        return possibilities
@@ -0,0 +1,151 @@
+import multiprocessing
+
+import batch
+import sudoku
+from sudoku import Sudoku
+
+
+def solve(puzzle, propagator=None, strategy=None, processes=None, subtrees=None):
+    """Return a new solved Sudoku instance, or None if no solution exist, searching the solutions of
+    a single puzzle with several worker processes.
+
+    The first levels of the search tree are expanded in the current process, with the propagator
+    and strategy of the search, until there are at least subtrees boards left to search, four per
+    worker by default so that the work stays balanced when some subtrees are much larger than the
+    others. The subtrees are then searched by sudoku.solve() in a pool of processes workers, the
+    number of CPUs by default, and the workers are stopped as soon as one of them finds a solution.
+    With 1, the subtrees are searched in the current process.
+
+    The propagator and strategy must be picklable, as the ones of the sudoku module are. When the
+    puzzle has several solutions, the one returned isn't necessarily the one sudoku.solve() returns.
+    """
+    for solution in _map(_solve_subtree, puzzle, propagator, strategy, processes, subtrees):
+        if solution is not None:
+            return puzzle.filled(batch.decode(solution))
+    return None
+
+
+def count_solutions(puzzle, limit=None, propagator=None, strategy=None, processes=None,
+                    subtrees=None):
+    """Return the number of solutions of a Sudoku, counting them with several worker processes.
+
+    The search tree is split as by solve(), the solutions of the subtrees are counted by
+    sudoku.count_solutions() and summed. The workers are stopped as soon as limit solutions are
+    found, if given.
+    """
+    total = 0
+    for count in _map(_count_subtree, puzzle, propagator, strategy, processes, subtrees, limit):
+        total += count
+        if limit is not None and total >= limit:
+            return limit
+    return total
+
+
+def has_unique_solution(puzzle, propagator=None, strategy=None, processes=None, subtrees=None):
+    """Return True if a Sudoku has exactly one solution, searching with several worker processes."""
+    return count_solutions(puzzle, 2, propagator, strategy, processes, subtrees) == 1
+
+
+def split(puzzle, count, propagator=None, strategy=None):
+    """Return boards, as lists of lists, whose solutions are together the solutions of a Sudoku.
+
+    The guesses of the search are made in every possible way, one level of the search tree at a
+    time and in the order in which the search would make them, until there are at least count
+    boards or no cell is left to guess. Each board is the puzzle with the values guessed, and
+    deduced by the propagator if given, along one branch of the tree. The branches without solution
+    found on the way are left out.
+    """
+    if strategy is None:
+        strategy = sudoku.RowMajor()
+
+    root = puzzle.copy()
+    candidates = None
+    if propagator is not None:
+        candidates = propagator.propagate(root)
+        if candidates is None:
+            return []
+
+    # Nodes of the search tree: a Sudoku, the candidates of its empty cells and the last cell guessed
+    nodes = [(root, candidates, None)]
+    expanded = True
+    while len(nodes) < count and expanded:
+        expanded = False
+        children = []
+        for index, node in enumerate(nodes):
+            if len(children) + len(nodes) - index >= count:
+                children.extend(nodes[index:])
+                break
+            node_children = _children(node, propagator, strategy)
+            if node_children is None:
+                children.append(node)
+            else:
+                expanded = True
+                children.extend(node_children)
+        nodes = children
+    return [node[0].board for node in nodes]
+
+
+def _children(node, propagator, strategy):
+    """Return the nodes of each possibility of the next cell to guess, None if all the cells have a
+    value.
+    """
+    puzzle, candidates, previous = node
+    cell = strategy.select_cell(puzzle, candidates, previous)
+    if cell is None:
+        return None
+
+    row, column = cell
+    if propagator is None:
+        possibilities = puzzle.possibilities(row, column)
+    else:
+        possibilities = candidates[cell]
+    children = []
+    for value in strategy.order_values(puzzle, candidates, row, column, possibilities):
+        child = puzzle.copy()
+        if propagator is None:
+            child.set_cell(row, column, value)
+            children.append((child, None, cell))
+        else:
+            remaining = propagator.assign(child, candidates, row, column, value)
+            if remaining is not None:
+                children.append((child, remaining, cell))
+    return children
+
+
+def _map(function, puzzle, propagator, strategy, processes, subtrees, *args):
+    """Generate the results of function for each subtree of the search of a puzzle, in the order in
+    which they are computed. The workers are stopped when the generator is closed.
+    """
+    if subtrees is None:
+        subtrees = 4 * (processes or multiprocessing.cpu_count())
+    compact = isinstance(puzzle, sudoku.CompactSudoku)
+    tasks = [
+        (batch.encode(board), compact, propagator, strategy) + args
+        for board in split(puzzle, subtrees, propagator, strategy)
+    ]
+
+    if processes == 1:
+        for task in tasks:
+            yield function(task)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap_unordered(function, tasks):
+            yield result
+        pool.close()
+    finally:
+        # Stop the workers still searching once the result is known
+        pool.terminate()
+        pool.join()
+
+
+def _solve_subtree(task):
+    encoded, compact, propagator, strategy = task
+    solution = sudoku.solve(Sudoku(batch.decode(encoded), compact), propagator, strategy)
+    return None if solution is None else batch.encode(solution)
+
+
+def _count_subtree(task):
+    encoded, compact, propagator, strategy, limit = task
+    return sudoku.count_solutions(Sudoku(batch.decode(encoded), compact), limit, propagator, strategy)
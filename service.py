@@ -0,0 +1,216 @@
+import asyncio
+import concurrent.futures
+import functools
+import os
+import sys
+import weakref
+
+import batch
+import sudoku
+
+
+class Overloaded(Exception):
+    pass
+
+
+class SolverService(object):
+    """Solve puzzles for asyncio applications on a fixed pool of workers, without blocking the
+    event loop.
+
+    The puzzles are solved by solver, sudoku.solve by default, in a pool of processes workers (the
+    number of CPUs by default), or in the given concurrent.futures executor. As for
+    batch.solve_batch(), the solver must be picklable to run in processes.
+
+    At most max_pending puzzles, twice processes or the number of CPUs by default, are given to the
+    pool at once by each event loop using the service, the other requests wait for their turn. When
+    queue_size requests are already waiting, the next ones fail right away with Overloaded instead
+    of making the queue grow.
+
+    timeout is the default number of seconds given to each request, waiting time included. It is
+    also given to the solver, as its timeout argument, so that the worker stops searching when the
+    request times out: solvers which don't accept a timeout, like dlx.solve, can't be used with a
+    timeout.
+
+    The service is an asynchronous context manager, closing it when leaving the context.
+    """
+
+    def __init__(self, solver=sudoku.solve, processes=None, max_pending=None, queue_size=None,
+                 timeout=None, executor=None):
+        self.solver = solver
+        self.timeout = timeout
+        self.queue_size = queue_size
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(processes)
+        self._executor = executor
+        self.max_pending = max_pending or 2 * (processes or os.cpu_count())
+        self._waiting = 0
+        # Semaphore limiting the puzzles given to the pool by each event loop, created on first use in
+        # the loop, as a semaphore can only be used by one loop
+        self._slots = weakref.WeakKeyDictionary()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the workers, if the service created them."""
+        if self._owns_executor:
+            # Before Python 3.9, shutting a pool of processes down without waiting for its workers
+            # can hang or raise
+            self._executor.shutdown(wait=sys.version_info < (3, 9))
+
+    async def solve(self, puzzle, timeout=None):
+        """Return a new solved Sudoku instance, or None if no solution exist, from a Sudoku or a
+        board.
+
+        asyncio.TimeoutError is raised if the puzzle isn't solved within timeout seconds, the
+        timeout of the service by default. The error raised by the solver, like MalformedBoard, is
+        raised again.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if self.queue_size is not None and self._waiting >= self.queue_size:
+            raise Overloaded('{} requests are already waiting'.format(self._waiting))
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        result = await asyncio.wait_for(self._solve(0, puzzle, deadline), timeout)
+        result = batch._decode_result(result)
+        if isinstance(result.error, batch.NoSolution):
+            return None
+        if isinstance(result.error, batch.SearchStopped) and str(result.error) == sudoku.TIMEOUT:
+            raise asyncio.TimeoutError()
+        if result.error is not None:
+            raise result.error
+        return result.solution
+
+    async def solve_batch(self, boards, ordered=True):
+        """Generate a batch.Result for each Sudoku or board of an iterable, asynchronously.
+
+        The boards are read as the workers need them, at most max_pending of them are solved at
+        once. The results are generated in the order of the boards if ordered is True, in the order
+        in which they are solved otherwise. Each board is given the timeout of the service, a board
+        not solved in time has a batch.SearchStopped error.
+        """
+        loop = asyncio.get_running_loop()
+        pending = []
+        try:
+            for index, board in enumerate(boards):
+                deadline = None if self.timeout is None else loop.time() + self.timeout
+                slots = await self._acquire()
+                # Submitted right away, so that the slot is released even if the batch is closed
+                # before the result is awaited
+                pending.append(asyncio.wrap_future(self._submit(index, board, deadline, slots)))
+
+                # Generate the results which are ready, and wait for some of them if too many are
+                # held back by a slow board in ordered mode
+                while pending:
+                    if ordered:
+                        if not pending[0].done() and len(pending) < 4 * self.max_pending:
+                            break
+                        result = await pending.pop(0)
+                    else:
+                        done = [future for future in pending if future.done()]
+                        if not done:
+                            break
+                        pending.remove(done[0])
+                        result = done[0].result()
+                    yield batch._decode_result(result)
+
+            while pending:
+                if ordered:
+                    result = await pending.pop(0)
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                    result = future.result()
+                yield batch._decode_result(result)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _acquire(self):
+        """Wait for a slot in the pool and return the semaphore it was taken from."""
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+        self._waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self._waiting -= 1
+        return slots
+
+    async def _solve(self, index, board, deadline):
+        slots = await self._acquire()
+        return await asyncio.wrap_future(self._submit(index, board, deadline, slots))
+
+    def _submit(self, index, board, deadline, slots):
+        """Give a board to the pool with a slot taken from slots, and return its
+        concurrent.futures.Future.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = None if deadline is None else max(0, deadline - loop.time())
+        try:
+            future = self._executor.submit(
+                _solve_task, (index, self.solver, batch.encode(board), timeout),
+            )
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is released when the worker is done, even if the request was cancelled
+        # meanwhile, so that the pool never has more than max_pending puzzles
+        future.add_done_callback(lambda _: _release(loop, slots))
+        return future
+
+
+def _release(loop, slots):
+    try:
+        loop.call_soon_threadsafe(slots.release)
+    except RuntimeError:
+        # The loop was closed while the worker was solving, nothing waits for the slot anymore
+        pass
+
+
+def _solve_task(task):
+    index, solver, encoded, timeout = task
+    if timeout is not None:
+        solver = functools.partial(solver, timeout=timeout)
+    return batch._solve_task((index, solver, encoded))
+
+
+_service = None
+
+
+async def solve_async(puzzle, timeout=None):
+    """Solve a Sudoku or a board like SolverService.solve(), with a service shared by the whole
+    process and created on first use. It can be used by several event loops one after the other,
+    and is stopped by close_shared_service().
+    """
+    return await _shared_service().solve(puzzle, timeout)
+
+
+def solve_batch_async(boards, ordered=True):
+    """Solve boards like SolverService.solve_batch(), with the service used by solve_async()."""
+    return _shared_service().solve_batch(boards, ordered)
+
+
+def close_shared_service():
+    """Stop the workers of the service used by solve_async(), if it was created. A new one is
+    created if solve_async() is called again.
+    """
+    global _service
+    if _service is not None:
+        _service.close()
+        _service = None
+
+
+def _shared_service():
+    global _service
+    if _service is None:
+        _service = SolverService()
+    return _service
@@ -1,41 +1,186 @@
+import itertools
 import math
+import sys
+import timeit
+
+
+# Tables describing the boards of each size, shared by all the Sudoku instances of that size
+_TABLES = {}
+
+
+def _tables(board_size):
+    tables = _TABLES.get(board_size)
+    if tables is None:
+        tables = _TABLES[board_size] = _Tables(board_size)
+    return tables
+
+
+class _Tables(object):
+    """Values, rows, columns and squares of the boards of a given size, and the peers of each of
+    their cells. They never change, so they are computed once and shared by every board of that
+    size and every solver.
+    """
+
+    def __init__(self, board_size):
+        self.values_per_square = vps = int(math.sqrt(board_size))
+        self.values = tuple(range(1, board_size + 1))
+        self.valid_values = frozenset(self.values)
+        cells = range(board_size)
+        self.top_left_corners = frozenset(
+            (top_row, left_column)
+            for top_row in range(0, board_size, vps)
+            for left_column in range(0, board_size, vps)
+        )
+        # Index of the square of each cell, by row and column
+        self.square_index = [[row // vps * vps + column // vps for column in cells] for row in cells]
+
+        self.rows = [[(row, column) for column in cells] for row in cells]
+        self.columns = [[(row, column) for row in cells] for column in cells]
+        self.squares = [
+            [
+                (top_row + row, left_column + column)
+                for row in range(vps) for column in range(vps)
+            ]
+            for top_row, left_column in sorted(self.top_left_corners)
+        ]
+        self.all = self.rows + self.columns + self.squares
+        # Offsets of the cells of each square in a flat row-major list of cells
+        self.square_offsets = [
+            [row * board_size + column for row, column in square] for square in self.squares
+        ]
+
+        self.peers = {}
+        for row in cells:
+            for column in cells:
+                peers = set(self.rows[row]) | set(self.columns[column])
+                peers.update(self.squares[self.square_index[row][column]])
+                peers.discard((row, column))
+                self.peers[row, column] = tuple(peers)
 
 
 class Sudoku(object):
 
-    def __init__(self, board):
+    def __new__(cls, board=None, compact=False):
+        # Sudoku(board, compact=True) builds the memory efficient representation of the board
+        if compact and cls is Sudoku:
+            cls = CompactSudoku
+        return super(Sudoku, cls).__new__(cls)
+
+    def __init__(self, board, compact=False):
         if not math.sqrt(len(board)).is_integer():
             raise MalformedBoard('The square root of the board\'s size must be an integer')
 
         self.board_size = len(board)
         self.values_per_square = int(math.sqrt(self.board_size))
-        self.board = [[None] * self.board_size for _ in xrange(self.board_size)]
-        # Coordinates of the cells which contain a value during the object's instantiation
-        self.unmodifiable_cells = set()
+        self._tables = _tables(self.board_size)
+        # Coordinates of the top left corner of every square
+        self.top_left_corner_of_squares = self._tables.top_left_corners
+        # Changes of the cells since the first mark(), None when they aren't recorded, and the
+        # positions in it of the marks not rolled back yet
+        self._undo_log = None
+        self._marks = []
+        self._init_storage()
 
         # Make sure the board is valid and initialize the instance variables with its content
-        for row in xrange(self.board_size):
+        valid_values = self._tables.valid_values
+        for row in range(self.board_size):
             if not len(board[row]) == self.board_size:
                 raise MalformedBoard('The board must be a square ({0}x{0})'.format(self.board_size))
-            for column in xrange(self.board_size):
-                value = board[row][column]
+            for column, value in enumerate(board[row]):
                 if value:
-                    if value not in self.valid_values():
+                    if value not in valid_values:
                         raise MalformedBoard('{} is not a valid value'.format(value))
-                    self.unmodifiable_cells.add((row, column))
-                self.board[row][column] = value
+                    self._set_given(row, column, value)
 
-        # Those coordinates are computed at object's initilization because the correct() method,
-        # which is called thousands of times during the brute-force resolution of the sudoku, needs it
-        self.top_left_corner_of_squares = set()
-        square_steps = range(0, self.board_size, self.values_per_square)
-        for square_top_row in square_steps:
-            for square_left_column in square_steps:
-                self.top_left_corner_of_squares.add((square_top_row, square_left_column))
+    def _init_storage(self):
+        self.board = [[None] * self.board_size for _ in range(self.board_size)]
+        # Coordinates of the cells which contain a value during the object's instantiation
+        self.unmodifiable_cells = set()
+        # Number of occurrences of each value in every row, column and square. They are kept up to
+        # date by set_cell() and clear_cell() so that neither correct() nor possibilities() have to
+        # scan the board
+        self._row_counts = [[0] * (self.board_size + 1) for _ in range(self.board_size)]
+        self._column_counts = [[0] * (self.board_size + 1) for _ in range(self.board_size)]
+        self._square_counts = [[0] * (self.board_size + 1) for _ in range(self.board_size)]
+        self._filled_cells = 0
+        # Number of values which appear more than once in a row, column or square
+        self._conflicts = 0
+
+    def _set_given(self, row, column, value):
+        self.unmodifiable_cells.add((row, column))
+        self.set_cell(row, column, value)
+
+    def copy(self):
+        """Return a copy of the Sudoku, without validating its board again.
+
+        The givens and the tables of the board size are shared with the copy, only the values of the
+        cells and their bookkeeping are copied.
+        """
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        other._copy_storage()
+        other._undo_log = None
+        other._marks = []
+        return other
+
+    __copy__ = copy
+
+    def _copy_storage(self):
+        self.board = [row[:] for row in self.board]
+        self._row_counts = [counts[:] for counts in self._row_counts]
+        self._column_counts = [counts[:] for counts in self._column_counts]
+        self._square_counts = [counts[:] for counts in self._square_counts]
+
+    def filled(self, board):
+        """Return a copy of the Sudoku whose modifiable cells have the values of a board, a
+        solution of it for instance, so that its cells which had no value stay modifiable.
+        """
+        other = self.copy()
+        for row, values in enumerate(board):
+            for column, value in enumerate(values):
+                if other.modifiable(row, column):
+                    other.set_cell(row, column, value)
+        return other
+
+    def mark(self):
+        """Return a mark of the current values of the cells, to go back to them with rollback().
+
+        The changes of the cells are recorded while a mark is open, so that many variants of a
+        board can be tried one after the other without copying it. Marks can be nested.
+        """
+        if self._undo_log is None:
+            self._undo_log = []
+        mark = len(self._undo_log)
+        self._marks.append(mark)
+        return mark
+
+    def rollback(self, mark):
+        """Undo the changes of the cells made since the given mark was returned by mark().
+
+        Rolling back closes the mark, and the ones taken after it. The changes aren't recorded
+        anymore once all the marks are closed, rolling back to a mark then does nothing.
+        """
+        while self._marks and self._marks[-1] > mark:
+            self._marks.pop()
+        if self._marks and self._marks[-1] == mark:
+            self._marks.pop()
+
+        undo_log, self._undo_log = self._undo_log, None
+        if undo_log is None:
+            # Nothing is recorded once all the marks are closed
+            return
+        while len(undo_log) > mark:
+            row, column, value = undo_log.pop()
+            if value:
+                self.set_cell(row, column, value)
+            else:
+                self.clear_cell(row, column)
+        if self._marks:
+            self._undo_log = undo_log
 
     def valid_values(self):
         """Return the values allowed given the board size."""
-        return {v for v in xrange(1, self.board_size + 1)}
+        return set(self._tables.valid_values)
 
     def modifiable(self, row, column):
         """Return True if the cell at the given coordinates is modifiable."""
@@ -43,46 +188,75 @@ class Sudoku(object):
 
     def correct(self):
         """Return True if the Sudoku is correct."""
-        # Return False if any row/column doesn't contain all the values
-        for i in xrange(self.board_size):
-            row_values = set(self.board[i])
-            column_values = {self.board[row][i] for row in xrange(self.board_size)}
-            if not row_values == column_values == self.valid_values():
-                return False
-
-        # Return False if any square doesn't contain all the values
-        for top_left_corner in self.top_left_corner_of_squares:
-            square_values = {self.board[r][c] for r, c in self.square_coordinates(*top_left_corner)}
-            if square_values != self.valid_values():
-                return False
+        return self._filled_cells == self.board_size ** 2 and not self._conflicts
 
-        return True
+    def cell(self, row, column):
+        """Return the value of the cell at the given coordinates, None if it is empty."""
+        return self.board[row][column]
+
+    def set_cell(self, row, column, value):
+        """Set the value of the cell at the given coordinates."""
+        if self.board[row][column]:
+            self.clear_cell(row, column)
+        if self._undo_log is not None:
+            self._undo_log.append((row, column, None))
+
+        self.board[row][column] = value
+        self._filled_cells += 1
+        for counts in self._unit_counts(row, column):
+            if counts[value]:
+                self._conflicts += 1
+            counts[value] += 1
+
+    def clear_cell(self, row, column):
+        """Remove the value of the cell at the given coordinates."""
+        value = self.board[row][column]
+        if not value:
+            return
+        if self._undo_log is not None:
+            self._undo_log.append((row, column, value))
+
+        self.board[row][column] = None
+        self._filled_cells -= 1
+        for counts in self._unit_counts(row, column):
+            counts[value] -= 1
+            if counts[value]:
+                self._conflicts -= 1
+
+    def square_index(self, row, column):
+        """Return the index of the square in which the given coordinates are, in row-major order."""
+        return self._tables.square_index[row][column]
+
+    def _unit_counts(self, row, column):
+        return (
+            self._row_counts[row],
+            self._column_counts[column],
+            self._square_counts[self._tables.square_index[row][column]],
+        )
 
     def square_coordinates(self, row, column):
         """Return the coordinates of the cells in the square in which the given coordinates are."""
-        top_row = row // self.values_per_square * self.values_per_square
-        left_column = column // self.values_per_square * self.values_per_square
-
-        for row_in_square in xrange(top_row, top_row + self.values_per_square):
-            for column_in_square in xrange(left_column, left_column + self.values_per_square):
-                yield row_in_square, column_in_square
+        return iter(self._tables.squares[self._tables.square_index[row][column]])
 
     def possibilities(self, row, column):
         """Return the valid possibilities for a given coordinate."""
-        p = self.valid_values()
+        row_counts, column_counts, square_counts = self._unit_counts(row, column)
+        p = {
+            v for v in self._tables.values
+            if not (row_counts[v] or column_counts[v] or square_counts[v])
+        }
 
-        for i in xrange(self.board_size):
-            if i != column:
-                p.discard(self.board[row][i])
-            if i != row:
-                p.discard(self.board[i][column])
-
-        for r, c in self.square_coordinates(row, column):
-            if r != row and c != column:
-                p.discard(self.board[r][c])
+        # The value of the cell itself is still possible if no other cell of its units contains it
+        value = self.board[row][column]
+        if value and row_counts[value] == column_counts[value] == square_counts[value] == 1:
+            p.add(value)
 
         return p
 
+    def candidate_count(self, row, column):
+        """Return the number of valid possibilities for a given coordinate."""
+        return len(self.possibilities(row, column))
+
     def __str__(self):
         # Find the largest width of the values's string representation
         value_width = max([len(str(v)) for v in self.valid_values()])
@@ -117,42 +291,958 @@ class Sudoku(object):
         return '\n'.join(lines)
 
 
-def solve(sudoku):
-    """Return a new solved Sudoku instance. Return None if no solution exist."""
-    def solve_recursive(sudoku, row=0, column=0):
-        if sudoku.correct():
-            return sudoku
+def solve(sudoku, propagator=None, strategy=None, stats=None, timeout=None, max_nodes=None,
+          cancel=None):
+    """Return a new solved Sudoku instance. Return None if no solution exist.
+
+    When a Propagator is given, its deduction techniques fill the cells they can before the search
+    starts and after every guess, so that only the cells they can't deduce are guessed.
+
+    The strategy decides which cell is guessed next and in which order its possibilities are tried.
+    It defaults to RowMajor().
+
+    When a SearchStats is given, it records what the search did.
+
+    The search can be given a timeout in seconds, a maximum number of nodes, and a cancel object
+    whose is_set() method returns True when the search must stop, like a threading.Event. They are
+    checked before each node of the search. If the search stops because of one of them, an
+    Interrupted result is returned, which can be passed to resume() to continue the search later.
+    """
+    budget = _Budget.of(timeout, max_nodes, cancel)
+    return _solve(sudoku.copy(), propagator, strategy, stats, budget)
+
+
+def resume(interrupted, stats=None, timeout=None, max_nodes=None, cancel=None):
+    """Continue the search of solve() which returned the given Interrupted result.
+
+    The search starts again where it stopped, with a new timeout, maximum number of nodes and cancel
+    object, and returns the same kind of result as solve(). The Interrupted result can be pickled to
+    resume the search in another process, and can be resumed several times.
+    """
+    checkpoint = interrupted.checkpoint
+    working, state = checkpoint.restore()
+    budget = _Budget.of(timeout, max_nodes, cancel)
+    return _solve(working, checkpoint.propagator, checkpoint.strategy, stats, budget, state)
+
+
+def _solve(working, propagator, strategy, stats, budget, state=None):
+    try:
+        for solution in _search(working, propagator, strategy, stats, budget, state):
+            return solution
+    except _Interrupt as e:
+        return Interrupted(e.reason, _Checkpoint(working, propagator, strategy, e.state))
+    return None
+
+
+def count_solutions(sudoku, limit=None, propagator=None, strategy=None, stats=None):
+    """Return the number of solutions of a Sudoku.
+
+    The search stops as soon as limit solutions are found, if given. It is the same search as the
+    one of solve(), with the same propagator and strategy.
+    """
+    solutions = _search(sudoku.copy(), propagator, strategy, stats)
+    return sum(1 for _ in itertools.islice(solutions, limit))
+
+
+def has_unique_solution(sudoku, propagator=None, strategy=None, stats=None):
+    """Return True if a Sudoku has exactly one solution."""
+    return count_solutions(sudoku, 2, propagator, strategy, stats) == 1
+
+
+def _search(sudoku, propagator, strategy, stats=None, budget=None, state=None):
+    """Generate the solutions of a Sudoku, by filling its empty cells.
+
+    The same instance is generated for each solution: its cells are cleared again when the search
+    resumes.
+
+    When a _Budget is given and runs out, _Interrupt is raised with the state of the search, from
+    which it can be started again.
+    """
+    if strategy is None:
+        strategy = RowMajor()
+
+    select_cell = strategy.select_cell
+    order_values = strategy.order_values
+    possibilities_of = sudoku.possibilities
+    correct = sudoku.correct
+    if propagator is not None:
+        propagate = propagator.propagate
+        assign = propagator.assign
+    if stats is not None:
+        # Only the instrumented search pays for the instrumentation
+        select_cell = stats._timed(select_cell, 'selection_seconds', 'nodes')
+        order_values = stats._timed(order_values, 'selection_seconds')
+        possibilities_of = stats._timed(possibilities_of, 'candidates_seconds', 'possibilities_calls')
+        correct = stats._timed(correct, 'validity_seconds')
+        if propagator is not None:
+            propagate = stats._timed(propagate, 'candidates_seconds')
+            assign = stats._timed(assign, 'candidates_seconds')
+
+    # The guesses are kept on an explicit stack instead of recursing for each of them, so that the
+    # number of empty cells isn't limited by the recursion limit. Each frame holds the guessed cell,
+    # its possibilities left to try (in reverse order), the candidates before the guess, the value
+    # guessed and the candidates after it.
+    if state is None:
+        candidates = None
+        if propagator is not None:
+            candidates = propagate(sudoku)
+            if candidates is None:
+                return
+        stack = []
+        previous = None
+    else:
+        candidates, previous, stack = state
+
+    while True:
+        if budget is not None:
+            reason = budget.exhausted()
+            if reason is not None:
+                raise _Interrupt(reason, (candidates, previous, stack))
+
+        cell = select_cell(sudoku, candidates, previous)
+        if cell is None:
+            # All the cells contain a value
+            if correct():
+                yield sudoku
+        else:
+            row, column = cell
+            if propagator is None:
+                possibilities = possibilities_of(row, column)
+            else:
+                possibilities = candidates[cell]
+            values = list(order_values(sudoku, candidates, row, column, possibilities))
+            if values:
+                values.reverse()
+                stack.append([cell, values, candidates, None, None])
+
+        # Try the next possibility of the last guessed cell, backtracking to the previous ones when
+        # all their possibilities have been tried
+        while stack:
+            frame = stack[-1]
+            cell, values, candidates, value, remaining = frame
+            row, column = cell
+            if value is not None:
+                if propagator is None:
+                    sudoku.clear_cell(row, column)
+                else:
+                    # Clear the cell and the ones deduced from it
+                    for r, c in candidates:
+                        if (r, c) not in remaining:
+                            sudoku.clear_cell(r, c)
+                if stats is not None:
+                    stats.undone(row, column, value, len(stack))
+
+            if not values:
+                stack.pop()
+                continue
+
+            value = values.pop()
+            if stats is not None:
+                stats.assigned(row, column, value, len(stack))
+            if propagator is None:
+                sudoku.set_cell(row, column, value)
+            else:
+                remaining = assign(sudoku, candidates, row, column, value)
+                if remaining is None:
+                    frame[3] = None
+                    if stats is not None:
+                        stats.undone(row, column, value, len(stack))
+                    continue
+                frame[4] = candidates = remaining
+            frame[3] = value
+            previous = cell
+            break
+        else:
+            return
+
+
+class SearchStats(object):
+    """Record what a search does, when passed to solve(), count_solutions() or has_unique_solution().
+
+    The counters are:
+        - nodes: number of times the next cell to guess is selected
+        - backtracks: number of guesses which have been undone
+        - max_depth: maximum number of simultaneous guesses
+        - possibilities_calls: number of calls to the possibilities() of the board by the search
+
+    and the time spent, in seconds:
+        - validity_seconds: checking whether the filled boards are correct
+        - candidates_seconds: computing the possibilities of the cells, or deducing them with the
+          Propagator
+        - selection_seconds: choosing the cells to guess and the order of their possibilities
+
+    on_assign and on_undo, if given, are called with the row, column, value and depth of each guess
+    when it is made and when it is undone. The same instance can be used for several searches, the
+    counters are then accumulated.
+    """
+
+    def __init__(self, on_assign=None, on_undo=None):
+        self.on_assign = on_assign
+        self.on_undo = on_undo
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.possibilities_calls = 0
+        self.validity_seconds = 0.0
+        self.candidates_seconds = 0.0
+        self.selection_seconds = 0.0
+
+    def assigned(self, row, column, value, depth):
+        """Called when a value is guessed."""
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.on_assign is not None:
+            self.on_assign(row, column, value, depth)
+
+    def undone(self, row, column, value, depth):
+        """Called when a guess is undone."""
+        self.backtracks += 1
+        if self.on_undo is not None:
+            self.on_undo(row, column, value, depth)
+
+    def as_dict(self):
+        """Return the counters in a dict, to feed a metrics system for instance."""
+        return {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'possibilities_calls': self.possibilities_calls,
+            'validity_seconds': self.validity_seconds,
+            'candidates_seconds': self.candidates_seconds,
+            'selection_seconds': self.selection_seconds,
+        }
+
+    def _timed(self, function, seconds_attribute, count_attribute=None):
+        def timed(*args):
+            if count_attribute is not None:
+                setattr(self, count_attribute, getattr(self, count_attribute) + 1)
+            start = timeit.default_timer()
+            try:
+                return function(*args)
+            finally:
+                setattr(
+                    self, seconds_attribute,
+                    getattr(self, seconds_attribute) + timeit.default_timer() - start,
+                )
+        return timed
+
+
+TIMEOUT = 'timeout'
+NODE_LIMIT = 'node limit'
+CANCELLED = 'cancelled'
+
+
+class Interrupted(object):
+    """Result of a search stopped before it found a solution, returned by solve() and resume().
+
+    reason is TIMEOUT, NODE_LIMIT or CANCELLED. It is false in a boolean context, like the None
+    returned when there is no solution, and can be passed to resume() to continue the search.
+    """
+
+    def __init__(self, reason, checkpoint):
+        self.reason = reason
+        self.checkpoint = checkpoint
+
+    def __bool__(self):
+        return False
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return 'Interrupted({!r})'.format(self.reason)
+
+
+class _Checkpoint(object):
+    """State of an interrupted search: the puzzle, its cells filled so far and the guesses left."""
+
+    def __init__(self, sudoku, propagator, strategy, state):
+        self.board = [list(row) for row in sudoku.board]
+        self.givens = [
+            [None if sudoku.modifiable(row, column) else value for column, value in enumerate(values)]
+            for row, values in enumerate(self.board)
+        ]
+        self.compact = isinstance(sudoku, CompactSudoku)
+        self.propagator = propagator
+        self.strategy = strategy
+        self.state = state
+
+    def restore(self):
+        """Return a new Sudoku filled as when the search stopped, and the state of the search."""
+        sudoku = Sudoku(self.givens, self.compact)
+        for row, values in enumerate(self.board):
+            for column, value in enumerate(values):
+                if value and sudoku.modifiable(row, column):
+                    sudoku.set_cell(row, column, value)
+
+        # The candidates are never modified, only the frames need to be copied to resume the same
+        # checkpoint again
+        candidates, previous, stack = self.state
+        stack = [[frame[0], list(frame[1])] + frame[2:] for frame in stack]
+        return sudoku, (candidates, previous, stack)
+
+
+class _Budget(object):
+    """Limits of a search, checked before each of its nodes."""
+
+    def __init__(self, timeout, max_nodes, cancel):
+        self.deadline = None if timeout is None else timeit.default_timer() + timeout
+        self.nodes_left = max_nodes
+        self.cancel = cancel
+
+    @classmethod
+    def of(cls, timeout, max_nodes, cancel):
+        """Return the budget of the given limits, None if there is no limit."""
+        if timeout is None and max_nodes is None and cancel is None:
+            return None
+        return cls(timeout, max_nodes, cancel)
+
+    def exhausted(self):
+        """Return the reason why the search must stop, None if it can go on with the next node."""
+        if self.cancel is not None and self.cancel.is_set():
+            return CANCELLED
+        if self.nodes_left is not None:
+            if self.nodes_left <= 0:
+                return NODE_LIMIT
+            self.nodes_left -= 1
+        if self.deadline is not None and timeit.default_timer() >= self.deadline:
+            return TIMEOUT
+        return None
+
+
+class _Interrupt(Exception):
+    def __init__(self, reason, state):
+        super(_Interrupt, self).__init__(reason)
+        self.reason = reason
+        self.state = state
+
+
+class RowMajor(object):
+    """Search strategy guessing the empty cells from left to right and top to bottom.
+
+    The possibilities of a cell are tried in ascending order, or starting with the least
+    constraining ones (those removing the fewest candidates from the empty peers of the cell) if
+    least_constraining_value is True.
+
+    The candidates passed to the methods are the ones maintained by the Propagator of the search,
+    None if there is none, in which case they are computed from the Sudoku.
+    """
+
+    def __init__(self, least_constraining_value=False):
+        self.least_constraining_value = least_constraining_value
+
+    def select_cell(self, sudoku, candidates, previous):
+        """Return the coordinates of the next cell to guess, None if all the cells have a value.
+
+        previous is the cell guessed at the previous level of the search, None at the first one.
+        """
+        index = 0 if previous is None else previous[0] * sudoku.board_size + previous[1] + 1
+        for index in range(index, sudoku.board_size ** 2):
+            row, column = divmod(index, sudoku.board_size)
+            if not sudoku.cell(row, column):
+                return row, column
+        return None
+
+    def order_values(self, sudoku, candidates, row, column, possibilities):
+        """Return the possibilities of a cell in the order in which they should be tried."""
+        # Sort them first to keep the search deterministic
+        possibilities = sorted(possibilities)
+        if not self.least_constraining_value:
+            return possibilities
+
+        peer_possibilities = [
+            candidates[peer] if candidates is not None else sudoku.possibilities(*peer)
+            for peer in sudoku._tables.peers[row, column]
+            if not sudoku.cell(*peer)
+        ]
+        return sorted(possibilities, key=lambda v: sum(v in p for p in peer_possibilities))
+
 
-        # We tried everything and couldn't solve the sudoku
-        if row is None or column is None:
+class MostConstrained(RowMajor):
+    """Search strategy guessing first the empty cell with the fewest possibilities.
+
+    Ties are broken by guessing first the cell with the most empty peers, as it restricts the most
+    the rest of the board.
+    """
+
+    def select_cell(self, sudoku, candidates, previous):
+        """Return the coordinates of the next cell to guess, None if all the cells have a value."""
+        if candidates is not None:
+            counts = ((len(possibilities), cell) for cell, possibilities in candidates.items())
+        else:
+            counts = (
+                (sudoku.candidate_count(row, column), (row, column))
+                for row in range(sudoku.board_size)
+                for column in range(sudoku.board_size)
+                if not sudoku.cell(row, column)
+            )
+
+        best_cells, best_count = [], None
+        for count, cell in counts:
+            if best_count is None or count < best_count:
+                best_cells, best_count = [cell], count
+                if count <= 1:
+                    # Dead end or forced value, no need to look any further
+                    break
+            elif count == best_count:
+                best_cells.append(cell)
+
+        if len(best_cells) < 2:
+            return best_cells[0] if best_cells else None
+
+        peers = sudoku._tables.peers
+        return min(
+            best_cells,
+            key=lambda cell: (-sum(1 for peer in peers[cell] if not sudoku.cell(*peer)), cell),
+        )
+
+
+class CompactSudoku(Sudoku):
+    """Sudoku storing its cells in a flat array and the values used by each unit in bitmasks.
+
+    Bit v of a mask is set when the value v is used in the row, column or square. This
+    representation needs a fraction of the memory of the nested lists and computes the
+    possibilities of a cell without building intermediate sets. The board attribute is a read-only
+    copy of the cells: they must be modified with set_cell() and clear_cell().
+    """
+
+    def _init_storage(self):
+        # Imported on first use, as it is slow to import and only this representation needs it
+        import array
+
+        cells_count = self.board_size ** 2
+        self._cells = array.array('B' if self.board_size < 256 else 'H', [0]) * cells_count
+        # 1 for the cells which contain a value during the object's instantiation
+        self._givens = bytearray(cells_count)
+        self._row_masks = [0] * self.board_size
+        self._column_masks = [0] * self.board_size
+        self._square_masks = [0] * self.board_size
+        # Bits 1 to board_size
+        self._all_values_mask = (1 << self.board_size + 1) - 2
+        self._filled_cells = 0
+        # Number of values which appear more than once in a row, column or square
+        self._conflicts = 0
+
+    def _set_given(self, row, column, value):
+        self._givens[row * self.board_size + column] = 1
+        self.set_cell(row, column, value)
+
+    def _copy_storage(self):
+        self._cells = self._cells[:]
+        self._row_masks = self._row_masks[:]
+        self._column_masks = self._column_masks[:]
+        self._square_masks = self._square_masks[:]
+
+    @property
+    def board(self):
+        n = self.board_size
+        return [[v or None for v in self._cells[r * n:(r + 1) * n]] for r in range(n)]
+
+    @property
+    def unmodifiable_cells(self):
+        n = self.board_size
+        return {divmod(i, n) for i, given in enumerate(self._givens) if given}
+
+    def modifiable(self, row, column):
+        """Return True if the cell at the given coordinates is modifiable."""
+        return not self._givens[row * self.board_size + column]
+
+    def cell(self, row, column):
+        """Return the value of the cell at the given coordinates, None if it is empty."""
+        return self._cells[row * self.board_size + column] or None
+
+    def set_cell(self, row, column, value):
+        """Set the value of the cell at the given coordinates."""
+        index = row * self.board_size + column
+        if self._cells[index]:
+            self.clear_cell(row, column)
+        if self._undo_log is not None:
+            self._undo_log.append((row, column, None))
+
+        self._cells[index] = value
+        self._filled_cells += 1
+        bit = 1 << value
+        square = self._tables.square_index[row][column]
+        row_masks, column_masks, square_masks = self._row_masks, self._column_masks, self._square_masks
+        if (row_masks[row] | column_masks[column] | square_masks[square]) & bit:
+            for masks, i in self._unit_masks(row, column):
+                if masks[i] & bit:
+                    self._conflicts += 1
+                else:
+                    masks[i] |= bit
+        else:
+            row_masks[row] |= bit
+            column_masks[column] |= bit
+            square_masks[square] |= bit
+
+    def clear_cell(self, row, column):
+        """Remove the value of the cell at the given coordinates."""
+        index = row * self.board_size + column
+        value = self._cells[index]
+        if not value:
+            return
+        if self._undo_log is not None:
+            self._undo_log.append((row, column, value))
+
+        self._cells[index] = 0
+        self._filled_cells -= 1
+        if not self._conflicts:
+            # The value can't be anywhere else in the units of the cell
+            bit = ~(1 << value)
+            self._row_masks[row] &= bit
+            self._column_masks[column] &= bit
+            self._square_masks[self._tables.square_index[row][column]] &= bit
+            return
+
+        # A mask can't tell how many times a value is used: look for another occurrence of the value
+        unit_cells = (
+            self._row_cells(row), self._column_cells(column), self._square_cells(row, column),
+        )
+        for (masks, i), cells in zip(self._unit_masks(row, column), unit_cells):
+            if value in cells:
+                self._conflicts -= 1
+            else:
+                masks[i] &= ~(1 << value)
+
+    def candidate_mask(self, row, column):
+        """Return the valid possibilities for a given coordinate as a bitmask."""
+        used = (
+            self._row_masks[row] | self._column_masks[column]
+            | self._square_masks[self._tables.square_index[row][column]]
+        )
+
+        # The value of the cell itself is still possible if no other cell of its units contains it
+        value = self._cells[row * self.board_size + column]
+        if value and not (self._conflicts and self._used_by_peers(row, column, value)):
+            used &= ~(1 << value)
+
+        return self._all_values_mask & ~used
+
+    def possibilities(self, row, column):
+        """Return the valid possibilities for a given coordinate."""
+        mask = self.candidate_mask(row, column)
+        # Only iterate over the bits which are set
+        values = set()
+        while mask:
+            bit = mask & -mask
+            values.add(bit.bit_length() - 1)
+            mask ^= bit
+        return values
+
+    def candidate_count(self, row, column):
+        """Return the number of valid possibilities for a given coordinate."""
+        return bin(self.candidate_mask(row, column)).count('1')
+
+    def _unit_masks(self, row, column):
+        return (
+            (self._row_masks, row),
+            (self._column_masks, column),
+            (self._square_masks, self._tables.square_index[row][column]),
+        )
+
+    def _used_by_peers(self, row, column, value):
+        return (
+            self._row_cells(row).count(value) > 1
+            or self._column_cells(column).count(value) > 1
+            or self._square_cells(row, column).count(value) > 1
+        )
+
+    def _row_cells(self, row):
+        return self._cells[row * self.board_size:(row + 1) * self.board_size]
+
+    def _column_cells(self, column):
+        return self._cells[column::self.board_size]
+
+    def _square_cells(self, row, column):
+        square = self._tables.square_index[row][column]
+        return [self._cells[i] for i in self._tables.square_offsets[square]]
+
+
+# Deduction techniques which can be enabled in a Propagator
+NAKED_SINGLES = 'naked singles'
+HIDDEN_SINGLES = 'hidden singles'
+NAKED_PAIRS = 'naked pairs'
+HIDDEN_PAIRS = 'hidden pairs'
+POINTING = 'pointing'
+ALL_TECHNIQUES = (NAKED_SINGLES, HIDDEN_SINGLES, NAKED_PAIRS, HIDDEN_PAIRS, POINTING)
+
+
+class Propagator(object):
+    """Fill the cells of a Sudoku which can be deduced without guessing.
+
+    The candidates of the empty cells are kept in a dict mapping their coordinates to the set of
+    their possible values. Those sets are never modified: they are replaced when a value is
+    eliminated, so a shallow copy of the dict is enough to save the state of the deduction.
+
+    The techniques are applied in the given order, starting again from the first one every time a
+    technique makes progress, until none of them does. The cheap techniques should thus come first.
+    """
+
+    def __init__(self, techniques=ALL_TECHNIQUES):
+        for technique in techniques:
+            if technique not in _TECHNIQUES:
+                raise ValueError('Unknown technique: {}'.format(technique))
+        self.techniques = tuple(techniques)
+
+    def propagate(self, sudoku, candidates=None):
+        """Fill the cells of the Sudoku which can be deduced from the candidates.
+
+        Return the candidates of the cells left empty. Return None if the Sudoku has no solution, in
+        which case it is left unchanged. The candidates are computed from the Sudoku if not given.
+        """
+        if candidates is None:
+            candidates = {}
+            for row in range(sudoku.board_size):
+                for column in range(sudoku.board_size):
+                    if not sudoku.cell(row, column):
+                        candidates[row, column] = sudoku.possibilities(row, column)
+            for possibilities in candidates.values():
+                if not possibilities:
+                    return None
+
+        return self._run(_Deduction(sudoku, dict(candidates), sudoku._tables))
+
+    def assign(self, sudoku, candidates, row, column, value):
+        """Set the value of an empty cell and fill the cells which can be deduced from it.
+
+        Return the candidates of the cells left empty. Return None if the value leads to a
+        contradiction, in which case the Sudoku is left unchanged.
+        """
+        deduction = _Deduction(sudoku, dict(candidates), sudoku._tables)
+        try:
+            deduction.assign((row, column), value)
+        except _Contradiction:
+            deduction.undo()
+            return None
+        return self._run(deduction)
+
+    def _run(self, deduction):
+        try:
+            progress = True
+            while progress:
+                for technique in self.techniques:
+                    progress = _TECHNIQUES[technique](deduction)
+                    if progress:
+                        break
+        except _Contradiction:
+            deduction.undo()
             return None
+        return deduction.candidates
+
+
+class _Contradiction(Exception):
+    pass
 
-        # Compute the next coordinate
-        next_row, next_column = row, column
-        if column < sudoku.board_size - 1:
-            next_column += 1
-        elif row < sudoku.board_size - 1:
-            next_row += 1
-            next_column = 0
-
-        if not sudoku.modifiable(row, column):
-            # This cell is not modifiable, go to the next one
-            return solve_recursive(sudoku, next_row, next_column)
-
-        for possibility in sudoku.possibilities(row, column):
-            # Try each possibility and go to the next cell
-            sudoku.board[row][column] = possibility
-            result = solve_recursive(sudoku, next_row, next_column)
-
-            if result:
-                # Return the solution if we found it
-                return result
+
+class _Deduction(object):
+    """State of a single run of a Propagator."""
+
+    def __init__(self, sudoku, candidates, units):
+        self.sudoku = sudoku
+        self.candidates = candidates
+        self.units = units
+        # Coordinates of the cells filled during this deduction
+        self.filled = []
+
+    def assign(self, cell, value):
+        self.sudoku.set_cell(cell[0], cell[1], value)
+        self.filled.append(cell)
+        del self.candidates[cell]
+        for peer in self.units.peers[cell]:
+            self.eliminate(peer, value)
+
+    def eliminate(self, cell, value):
+        """Remove a value from the candidates of a cell. Return True if it was one of them."""
+        possibilities = self.candidates.get(cell)
+        if possibilities is None or value not in possibilities:
+            return False
+
+        if len(possibilities) == 1:
+            raise _Contradiction()
+        self.candidates[cell] = possibilities - {value}
+        return True
+
+    def undo(self):
+        for row, column in self.filled:
+            self.sudoku.clear_cell(row, column)
+        del self.filled[:]
+
+    def places(self, unit):
+        """Return the cells of a unit in which each value can go.
+
+        Raise a contradiction if a value can't go anywhere in the unit.
+        """
+        places = {}
+        missing_values = self.sudoku.valid_values()
+        for cell in unit:
+            possibilities = self.candidates.get(cell)
+            if possibilities is None:
+                missing_values.discard(self.sudoku.cell(*cell))
             else:
-                # Clear the cell to make sure the next attempt doesn't take it into account
-                sudoku.board[row][column] = None
+                for value in possibilities:
+                    places.setdefault(value, []).append(cell)
+
+        if len(places) < len(missing_values):
+            raise _Contradiction()
+        return places
+
+
+def _naked_singles(deduction):
+    """Fill the cells which have a single candidate."""
+    progress = False
+    for cell in list(deduction.candidates):
+        possibilities = deduction.candidates.get(cell)
+        if possibilities is not None and len(possibilities) == 1:
+            deduction.assign(cell, next(iter(possibilities)))
+            progress = True
+    return progress
+
 
-    return solve_recursive(Sudoku(sudoku.board))
+def _hidden_singles(deduction):
+    """Fill the cells which are the only place of a unit where a value can go."""
+    progress = False
+    for unit in deduction.units.all:
+        for value, cells in deduction.places(unit).items():
+            if len(cells) == 1 and value in deduction.candidates.get(cells[0], ()):
+                deduction.assign(cells[0], value)
+                progress = True
+    return progress
+
+
+def _naked_pairs(deduction):
+    """Remove the values of two cells of a unit having the same two candidates from the others."""
+    progress = False
+    for unit in deduction.units.all:
+        cells_by_pair = {}
+        for cell in unit:
+            possibilities = deduction.candidates.get(cell)
+            if possibilities is not None and len(possibilities) == 2:
+                cells_by_pair.setdefault(frozenset(possibilities), []).append(cell)
+
+        for pair, cells in cells_by_pair.items():
+            if len(cells) > 2:
+                # Three cells can't share two values
+                raise _Contradiction()
+            if len(cells) == 2:
+                for cell in unit:
+                    if cell not in cells:
+                        for value in pair:
+                            progress |= deduction.eliminate(cell, value)
+    return progress
+
+
+def _hidden_pairs(deduction):
+    """Remove the other candidates of two cells which are the only places of two values in a unit."""
+    progress = False
+    for unit in deduction.units.all:
+        values_by_places = {}
+        for value, cells in deduction.places(unit).items():
+            if len(cells) == 2:
+                values_by_places.setdefault(tuple(cells), []).append(value)
+
+        for cells, values in values_by_places.items():
+            if len(values) > 2:
+                # Three values can't share two cells
+                raise _Contradiction()
+            if len(values) == 2:
+                for cell in cells:
+                    for value in deduction.candidates[cell] - set(values):
+                        progress |= deduction.eliminate(cell, value)
+    return progress
+
+
+def _pointing(deduction):
+    """Remove values confined to the intersection of a square and a row or column from the rest.
+
+    If the places of a value in a square all are in the same row (or column), the value can't go
+    anywhere else in that row (or column). Conversely, if the places of a value in a row (or column)
+    all are in the same square, the value can't go anywhere else in that square.
+    """
+    units = deduction.units
+    square_index = units.square_index
+    progress = False
+    for square in units.squares:
+        for value, cells in deduction.places(square).items():
+            rows = {row for row, _ in cells}
+            columns = {column for _, column in cells}
+            lines = []
+            if len(rows) == 1:
+                lines.append(units.rows[rows.pop()])
+            if len(columns) == 1:
+                lines.append(units.columns[columns.pop()])
+            for line in lines:
+                for cell in line:
+                    if cell not in cells:
+                        progress |= deduction.eliminate(cell, value)
+
+    for line in units.rows + units.columns:
+        for value, cells in deduction.places(line).items():
+            squares = {square_index[row][column] for row, column in cells}
+            if len(squares) == 1:
+                for cell in units.squares[squares.pop()]:
+                    if cell not in cells:
+                        progress |= deduction.eliminate(cell, value)
+    return progress
+
+
+_TECHNIQUES = {
+    NAKED_SINGLES: _naked_singles,
+    HIDDEN_SINGLES: _hidden_singles,
+    NAKED_PAIRS: _naked_pairs,
+    HIDDEN_PAIRS: _hidden_pairs,
+    POINTING: _pointing,
+}
 
 
 class MalformedBoard(Exception):
     pass
+
+
+# Characters standing for the values in the one puzzle per line format, after 1 to 9
+VALUE_CHARACTERS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+EMPTY_CHARACTERS = ('.', '0')
+
+
+def parse_puzzle(line):
+    """Return the board described by a line of the one puzzle per line format.
+
+    Every cell is a character, row after row: 1 to 9 then A to Z for the values, '.' or '0' for the
+    empty cells. Boards with more than 35 values use whole numbers separated by spaces or commas.
+    Return None for blank lines and comments (lines starting with '#').
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    if any(separator in line for separator in ' \t,'):
+        tokens = line.replace(',', ' ').split()
+    else:
+        tokens = line.upper()
+
+    values = []
+    for token in tokens:
+        if token in EMPTY_CHARACTERS:
+            values.append(None)
+        elif len(tokens) == len(line) and token in VALUE_CHARACTERS:
+            values.append(VALUE_CHARACTERS.index(token) + 1)
+        elif token.isdigit():
+            values.append(int(token))
+        else:
+            raise MalformedBoard('{} is not a valid value'.format(token))
+
+    size = int(round(math.sqrt(len(values))))
+    if size ** 2 != len(values):
+        raise MalformedBoard('The number of cells must be the square of the board\'s size')
+    return [values[row * size:(row + 1) * size] for row in range(size)]
+
+
+def format_puzzle(sudoku):
+    """Return the line describing a Sudoku, or a board, in the one puzzle per line format."""
+    board = sudoku.board if isinstance(sudoku, Sudoku) else sudoku
+    if len(board) <= len(VALUE_CHARACTERS):
+        return ''.join(VALUE_CHARACTERS[v - 1] if v else '.' for row in board for v in row)
+    return ' '.join(str(v) if v else '.' for row in board for v in row)
+
+
+def read_puzzles(lines):
+    """Generate the boards described by an iterable of lines, like a file.
+
+    The lines are read one at a time, so that files of any size can be read in constant memory.
+    MalformedBoard is raised, mentioning the line number, if a line can't be parsed.
+    """
+    for number, line in enumerate(lines, 1):
+        try:
+            board = parse_puzzle(line)
+        except MalformedBoard as e:
+            raise MalformedBoard('Line {}: {}'.format(number, e))
+        if board is not None:
+            yield board
+
+
+def write_puzzles(puzzles, output):
+    """Write Sudoku instances, or boards, in the one puzzle per line format to a file."""
+    for puzzle in puzzles:
+        output.write(format_puzzle(puzzle) + '\n')
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    """Solve the puzzles of a file, or stdin, and write their solutions to stdout."""
+    import argparse
+    import functools
+    import time
+
+    import batch
+
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    parser = argparse.ArgumentParser(
+        prog='python -m sudoku',
+        description='Solve puzzles in the one puzzle per line format. The solutions are written to '
+                    'stdout, the errors and statistics to stderr.',
+    )
+    parser.add_argument('file', nargs='?', help='file containing the puzzles, stdin by default')
+    parser.add_argument('--engine', choices=['backtracking', 'dlx'], default='backtracking')
+    parser.add_argument(
+        '--propagate', action='store_true', help='deduce what can be before guessing (backtracking)'
+    )
+    parser.add_argument(
+        '--strategy', choices=['row-major', 'most-constrained'], default='row-major',
+        help='order in which the cells are guessed (backtracking)',
+    )
+    parser.add_argument(
+        '-j', '--processes', type=int, default=1,
+        help='number of worker processes, 0 for one per CPU (default: 1)',
+    )
+    parser.add_argument('--chunksize', type=int, default=16, help='puzzles sent to a worker at once')
+    args = parser.parse_args(argv)
+
+    if args.engine == 'dlx':
+        import dlx
+        solver = dlx.solve
+    else:
+        strategy = MostConstrained() if args.strategy == 'most-constrained' else RowMajor()
+        propagator = Propagator() if args.propagate else None
+        solver = functools.partial(solve, propagator=propagator, strategy=strategy)
+
+    def boards(lines):
+        # Report the malformed lines without interrupting the others
+        for number, line in enumerate(lines, 1):
+            try:
+                board = parse_puzzle(line)
+            except MalformedBoard as e:
+                stderr.write('Line {}: {}\n'.format(number, e))
+                continue
+            if board is not None:
+                yield board
+
+    input_file = open(args.file) if args.file else stdin
+    start = time.time()
+    solved = failed = 0
+    try:
+        results = batch.solve_batch(
+            boards(input_file), solver, processes=args.processes or None, chunksize=args.chunksize,
+        )
+        for result in results:
+            if result.solution is None:
+                failed += 1
+                stderr.write('Puzzle {}: {}\n'.format(result.index + 1, result.error))
+            else:
+                solved += 1
+                stdout.write(format_puzzle(result.solution) + '\n')
+    finally:
+        if args.file:
+            input_file.close()
+
+    elapsed = time.time() - start
+    stderr.write('Solved {} of {} puzzles in {:.3f}s ({:.1f} puzzles/s)\n'.format(
+        solved, solved + failed, elapsed, (solved + failed) / elapsed if elapsed else 0,
+    ))
+    return 0 if not failed else 1
+
+
+if __name__ == '__main__':
+    # Run main() from the sudoku module rather than from __main__, so that the classes it uses are
+    # the same as the ones the worker processes import
+    import sudoku
+    sys.exit(sudoku.main())
@@ -0,0 +1,12 @@
+# Coroutines of the tests of the service, apart from them since Python 2 can't parse them
+
+
+async def first_result(results):
+    """Return the first item of an asynchronous generator, which is closed in the same step, as
+    when a loop over its items is left early.
+    """
+    try:
+        async for result in results:
+            return result
+    finally:
+        await results.aclose()
@@ -0,0 +1,103 @@
+import functools
+import time
+import unittest
+
+import batch
+import dlx
+import sudoku
+from sudoku import Sudoku
+from test.test_sudoku import (
+    EASY, MEDIUM, HARD, EVIL, HARDEST, IMPOSSIBLE, EASY_4x4, EASY_16x16, INVALID_BOARD_NOT_SQUARE_SHAPE,
+    INVALID_BOARD_INVALID_VALUE,
+)
+
+
+def _timed_solver(puzzle):
+    # Slow for the boards having a value, and report when the solving started and ended
+    start = time.time()
+    if puzzle.cell(0, 0):
+        time.sleep(0.5)
+    raise ValueError(start, time.time())
+
+
+BOARDS = [EASY, MEDIUM, INVALID_BOARD_INVALID_VALUE, HARD, IMPOSSIBLE, EASY_4x4, EVIL, EASY_16x16]
+
+
+class TestBatch(unittest.TestCase):
+
+    def check_results(self, results):
+        self.assertEqual(sorted(r.index for r in results), list(range(len(BOARDS))))
+        for result in results:
+            if result.index == 2:
+                self.assertIsNone(result.solution)
+                self.assertIsInstance(result.error, sudoku.MalformedBoard)
+            elif result.index == 4:
+                self.assertIsNone(result.solution)
+                self.assertIsInstance(result.error, batch.NoSolution)
+            else:
+                self.assertIsNone(result.error)
+                self.assertTrue(result.solution.correct())
+                self.assertEqual(
+                    result.solution.unmodifiable_cells,
+                    Sudoku(BOARDS[result.index]).unmodifiable_cells,
+                )
+
+    def test_ordered(self):
+        results = list(batch.solve_batch(BOARDS, processes=2))
+        self.assertEqual([r.index for r in results], list(range(len(BOARDS))))
+        self.check_results(results)
+
+    def test_unordered(self):
+        self.check_results(list(batch.solve_batch(BOARDS, processes=2, chunksize=3, ordered=False)))
+
+    def test_in_process(self):
+        self.check_results(list(batch.solve_batch(iter(BOARDS), processes=1)))
+
+    def test_solver(self):
+        self.check_results(list(batch.solve_batch(BOARDS, dlx.solve, processes=2)))
+
+    def test_solver_partial(self):
+        solver = functools.partial(sudoku.solve, propagator=sudoku.Propagator())
+        self.check_results(list(batch.solve_batch(BOARDS, solver, processes=2)))
+
+    def test_search_stopped(self):
+        solver = functools.partial(sudoku.solve, max_nodes=1)
+        results = list(batch.solve_batch([HARDEST], solver, processes=1))
+        self.assertIsNone(results[0].solution)
+        self.assertIsInstance(results[0].error, batch.SearchStopped)
+        self.assertEqual(str(results[0].error), sudoku.NODE_LIMIT)
+
+    def test_sudoku_instances(self):
+        results = list(batch.solve_batch([Sudoku(EASY, compact=True)], processes=1))
+        self.assertTrue(results[0].solution.correct())
+
+    def test_slow_board(self):
+        # The other boards are solved while the first one is: the boards are given to the workers
+        # as they become free, not a window of boards at a time
+        boards = [EASY_4x4] + [[[None] * 4] * 4] * 19
+        results = list(batch.solve_batch(boards, _timed_solver, processes=2, ordered=False))
+        self.assertEqual(sorted(r.index for r in results), list(range(20)))
+        self.assertEqual(results[-1].index, 0)
+        slow_end = results[-1].error.args[1]
+        self.assertTrue(all(r.error.args[0] < slow_end for r in results))
+
+    def test_stop_early(self):
+        results = batch.solve_batch(BOARDS * 10, processes=2)
+        self.assertEqual(next(results).index, 0)
+        results.close()
+
+    # encode / decode
+    def test_encode(self):
+        self.assertEqual(
+            batch.encode(EASY_4x4),
+            (4, b'\x03\x04\x01\x00\x00\x02\x00\x00\x00\x00\x02\x00\x00\x01\x04\x03'),
+        )
+        self.assertEqual(batch.decode(batch.encode(EASY_16x16)), EASY_16x16)
+        self.assertEqual(batch.decode(batch.encode(Sudoku(EASY))), EASY)
+
+    def test_encode_malformed(self):
+        self.assertEqual(
+            batch.encode(INVALID_BOARD_NOT_SQUARE_SHAPE), INVALID_BOARD_NOT_SQUARE_SHAPE
+        )
+        self.assertEqual(batch.encode([['x']]), [['x']])
+        self.assertEqual(batch.decode(batch.encode([[300]])), [[300]])
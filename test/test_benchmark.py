@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import benchmark
+import sudoku
+from sudoku import Sudoku
+from test.test_sudoku import EASY, HARDEST, IMPOSSIBLE, EASY_4x4
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.corpus = os.path.join(self.directory, 'corpus.txt')
+        with open(self.corpus, 'w') as f:
+            f.write('# easy\n{}\n{}\n# impossible\n{}\n'.format(
+                sudoku.format_puzzle(EASY), sudoku.format_puzzle(EASY_4x4),
+                sudoku.format_puzzle(IMPOSSIBLE),
+            ))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_corpus(self):
+        puzzles = benchmark.read_corpus(self.corpus)
+        self.assertEqual([(name, label) for name, label, _ in puzzles], [
+            ('corpus.txt:2', 'easy'), ('corpus.txt:3', 'easy'), ('corpus.txt:5', 'impossible'),
+        ])
+        self.assertEqual(puzzles[0][2], EASY)
+
+    def test_bundled_corpora(self):
+        for corpus in benchmark.DEFAULT_CORPORA:
+            puzzles = benchmark.read_corpus(os.path.join(benchmark.CORPUS_DIRECTORY, corpus))
+            self.assertTrue(puzzles)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([3], 90), 3)
+
+    def test_run_benchmark(self):
+        report = benchmark.run_benchmark([self.corpus], ['propagation', 'dlx'], repeat=2)
+        self.assertEqual([(r['corpus'], r['engine']) for r in report['results']], [
+            ('corpus.txt', 'propagation'), ('corpus.txt', 'dlx'),
+        ])
+        propagation, dlx = report['results']
+        self.assertEqual((propagation['puzzles'], propagation['solved']), (3, 2))
+        self.assertGreaterEqual(propagation['nodes'], 2)
+        self.assertIsNone(dlx['nodes'])
+        self.assertLessEqual(propagation['latency']['p50'], propagation['latency']['max'])
+        self.assertGreater(propagation['peak_rss_kb'], 0)
+        # The report can be saved as JSON
+        self.assertEqual(json.loads(json.dumps(report)), report)
+
+    def test_nodes(self):
+        solution, nodes = benchmark.ENGINES['backtracking'](Sudoku(HARDEST))
+        self.assertTrue(solution.correct())
+        self.assertGreater(nodes, 1000)
+
+    def test_compare(self):
+        report = benchmark.run_benchmark([self.corpus], ['dlx'])
+        self.assertEqual(benchmark.compare(report, report, 0.1), [])
+
+        baseline = json.loads(json.dumps(report))
+        baseline['results'][0]['latency']['mean'] /= 2
+        regressions = benchmark.compare(report, baseline, 0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('dlx on corpus.txt', regressions[0])
+        self.assertEqual(benchmark.compare(report, baseline, 1.5), [])
+
+    def test_measure_startup(self):
+        startup = benchmark.measure_startup(EASY, repeat=2)
+        self.assertGreater(startup['import_seconds'], 0)
+        self.assertGreater(startup['first_solve_seconds'], 0)
+        self.assertGreater(
+            startup['process_seconds'], startup['import_seconds'] + startup['first_solve_seconds'],
+        )
+
+    def test_compare_startup(self):
+        report = benchmark.run_benchmark([self.corpus], ['dlx'])
+        report['startup'] = {
+            'import_seconds': 0.02, 'first_solve_seconds': 0.01, 'process_seconds': 0.05,
+        }
+        baseline = json.loads(json.dumps(report))
+        self.assertEqual(benchmark.compare(report, baseline, 0.1), [])
+
+        baseline['startup']['import_seconds'] = 0.01
+        regressions = benchmark.compare(report, baseline, 0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('import and first solve', regressions[0])
+        # Reports without startup measurements are still compared
+        del baseline['startup']
+        self.assertEqual(benchmark.compare(report, baseline, 0.1), [])
+
+    def test_main_startup(self):
+        stdout = StringIO()
+        argv = ['--corpus', self.corpus, '--engine', 'dlx', '--startup-runs', '1']
+        self.assertEqual(benchmark.main(argv, stdout), 0)
+        self.assertIn('Startup: import', stdout.getvalue())
+
+    def test_main_baseline(self):
+        path = os.path.join(self.directory, 'report.json')
+        argv = [
+            '--corpus', self.corpus, '--engine', 'dlx', '--json', path, '--startup-runs', '0',
+        ]
+        self.assertEqual(benchmark.main(argv, StringIO()), 0)
+        with open(path) as f:
+            baseline = json.load(f)
+        baseline['results'][0]['latency']['mean'] /= 10
+        with open(path, 'w') as f:
+            json.dump(baseline, f)
+        argv = argv[:4] + ['--baseline', path, '--threshold', '0.5', '--startup-runs', '0']
+        self.assertEqual(benchmark.main(argv, StringIO()), 1)
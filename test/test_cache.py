@@ -0,0 +1,153 @@
+import functools
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import cache
+import sudoku
+from sudoku import Sudoku
+from test.test_sudoku import EASY, HARD, HARDEST, IMPOSSIBLE, EASY_16x16, full_board
+
+
+def transformed(board, rng):
+    """Return a random equivalent board."""
+    size = len(board)
+    values_per_square = int(round(size ** 0.5))
+
+    def order():
+        squares = list(range(values_per_square))
+        rng.shuffle(squares)
+        lines = []
+        for square in squares:
+            square_lines = list(range(square * values_per_square, (square + 1) * values_per_square))
+            rng.shuffle(square_lines)
+            lines.extend(square_lines)
+        return lines
+
+    values = list(range(1, size + 1))
+    rng.shuffle(values)
+    rows, columns = order(), order()
+    board = [[values[board[r][c] - 1] if board[r][c] else None for c in columns] for r in rows]
+    if rng.random() < 0.5:
+        board = [list(column) for column in zip(*board)]
+    return board
+
+
+class TestCanonicalForm(unittest.TestCase):
+
+    def test_equivalent_boards(self):
+        rng = random.Random(0)
+        for board in (EASY, HARDEST, EASY_16x16):
+            canonical, _ = cache.canonical_form(board)
+            for _ in range(10):
+                self.assertEqual(cache.canonical_form(transformed(board, rng))[0], canonical)
+
+    def test_different_boards(self):
+        self.assertNotEqual(cache.canonical_form(EASY)[0], cache.canonical_form(HARD)[0])
+
+    def test_sudoku(self):
+        self.assertEqual(cache.canonical_form(Sudoku(EASY))[0], cache.canonical_form(EASY)[0])
+
+    def test_transformation(self):
+        canonical, transformation = cache.canonical_form(transformed(HARDEST, random.Random(1)))
+        self.assertEqual(transformation.apply(transformed(HARDEST, random.Random(1))), canonical)
+        self.assertEqual(
+            transformation.revert(canonical), transformed(HARDEST, random.Random(1)),
+        )
+
+    def test_solution_transformation(self):
+        board = transformed(HARDEST, random.Random(2))
+        _, transformation = cache.canonical_form(board)
+        solution = sudoku.solve(Sudoku(board), sudoku.Propagator()).board
+        self.assertTrue(Sudoku(transformation.apply(solution)).correct())
+        self.assertEqual(transformation.revert(transformation.apply(solution)), solution)
+
+    def test_symmetric_board(self):
+        # Too many arrangements to compare them all
+        board = full_board(3)
+        canonical, transformation = cache.canonical_form(board)
+        self.assertEqual(transformation.apply(board), canonical)
+        self.assertTrue(Sudoku(canonical).correct())
+
+    def test_empty_board(self):
+        canonical, _ = cache.canonical_form([[None] * 4] * 4)
+        self.assertEqual(canonical, [[None] * 4] * 4)
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_solve(self):
+        solutions = cache.SolutionCache()
+        solved = solutions.solve(Sudoku(HARDEST))
+        self.assertTrue(solved.correct())
+        self.assertEqual((solutions.hits, solutions.misses, len(solutions)), (0, 1, 1))
+
+    def test_hit_equivalent(self):
+        solutions = cache.SolutionCache()
+        solutions.solve(Sudoku(HARDEST))
+        rng = random.Random(3)
+        for _ in range(5):
+            puzzle = Sudoku(transformed(HARDEST, rng))
+            solved = solutions.solve(puzzle)
+            self.assertTrue(solved.correct())
+            self.assertEqual(solved.unmodifiable_cells, puzzle.unmodifiable_cells)
+        self.assertEqual((solutions.hits, solutions.misses, len(solutions)), (5, 1, 1))
+
+    def test_compact(self):
+        solutions = cache.SolutionCache()
+        solutions.solve(Sudoku(EASY))
+        solved = solutions.solve(Sudoku(EASY, compact=True))
+        self.assertIsInstance(solved, sudoku.CompactSudoku)
+        self.assertTrue(solved.correct())
+        self.assertEqual(solutions.hits, 1)
+
+    def test_no_solution(self):
+        solutions = cache.SolutionCache()
+        self.assertIsNone(solutions.solve(Sudoku(IMPOSSIBLE)))
+        self.assertIsNone(solutions.solve(Sudoku(IMPOSSIBLE)))
+        self.assertEqual((solutions.hits, solutions.misses), (1, 1))
+
+    def test_interrupted(self):
+        solutions = cache.SolutionCache(solver=functools.partial(sudoku.solve, max_nodes=1))
+        self.assertIsInstance(solutions.solve(Sudoku(HARDEST)), sudoku.Interrupted)
+        self.assertEqual(len(solutions), 0)
+
+    def test_eviction(self):
+        solutions = cache.SolutionCache(maxsize=2)
+        solutions.solve(Sudoku(EASY))
+        solutions.solve(Sudoku(HARD))
+        solutions.solve(Sudoku(EASY))
+        solutions.solve(Sudoku(HARDEST))
+        self.assertEqual((len(solutions), solutions.evictions), (2, 1))
+        # HARD was the least recently used
+        solutions.solve(Sudoku(EASY))
+        solutions.solve(Sudoku(HARD))
+        self.assertEqual((solutions.hits, solutions.misses), (2, 4))
+
+    def test_clear(self):
+        solutions = cache.SolutionCache()
+        solutions.solve(Sudoku(EASY))
+        solutions.clear()
+        self.assertEqual(len(solutions), 0)
+
+    def test_save_load(self):
+        path = os.path.join(self.directory, 'cache.json')
+        solutions = cache.SolutionCache(path=path)
+        solutions.solve(Sudoku(HARDEST))
+        solutions.solve(Sudoku(IMPOSSIBLE))
+        solutions.save()
+
+        loaded = cache.SolutionCache(path=path)
+        self.assertEqual(len(loaded), 2)
+        self.assertTrue(loaded.solve(Sudoku(transformed(HARDEST, random.Random(4)))).correct())
+        self.assertIsNone(loaded.solve(Sudoku(IMPOSSIBLE)))
+        self.assertEqual((loaded.hits, loaded.misses), (2, 0))
+        self.assertEqual(os.listdir(self.directory), ['cache.json'])
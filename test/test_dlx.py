@@ -0,0 +1,58 @@
+import random
+import unittest
+
+import dlx
+from sudoku import Sudoku
+from test.test_sudoku import EASY, HARDEST, IMPOSSIBLE, INCORRECT, EASY_4x4, EASY_16x16, full_board
+
+
+class TestDancingLinks(unittest.TestCase):
+
+    def test_solve_easy(self):
+        self.assertTrue(dlx.solve(Sudoku(EASY)).correct())
+
+    def test_solve_hardest(self):
+        solved = dlx.solve(Sudoku(HARDEST))
+        self.assertTrue(solved.correct())
+        for row, column in Sudoku(HARDEST).unmodifiable_cells:
+            self.assertEqual(solved.cell(row, column), HARDEST[row][column])
+
+    def test_solve_impossible(self):
+        self.assertIsNone(dlx.solve(Sudoku(IMPOSSIBLE)))
+
+    def test_solve_incorrect(self):
+        self.assertIsNone(dlx.solve(Sudoku(INCORRECT)))
+
+    def test_solve_4x4(self):
+        self.assertTrue(dlx.solve(Sudoku(EASY_4x4)).correct())
+
+    def test_solve_16x16(self):
+        self.assertTrue(dlx.solve(Sudoku(EASY_16x16)).correct())
+
+    def test_solve_25x25(self):
+        board = full_board(5)
+        rng = random.Random(0)
+        for row in range(25):
+            for column in range(25):
+                if rng.random() < 0.4:
+                    board[row][column] = None
+        self.assertTrue(dlx.solve(Sudoku(board)).correct())
+
+    def test_solve_compact(self):
+        solved = dlx.solve(Sudoku(HARDEST, compact=True))
+        self.assertIsInstance(solved, Sudoku)
+        self.assertTrue(solved.correct())
+
+    def test_solve_correct(self):
+        board = full_board(3)
+        self.assertEqual(dlx.solve(Sudoku(board)).board, board)
+
+    def test_solutions_unique(self):
+        self.assertEqual(len(list(dlx.solutions(Sudoku(EASY)))), 1)
+
+    def test_solutions_empty_4x4(self):
+        # There are 288 different 4x4 sudokus
+        solutions = list(dlx.solutions(Sudoku([[None] * 4] * 4)))
+        self.assertEqual(len(solutions), 288)
+        self.assertEqual(len({str(s) for s in solutions}), 288)
+        self.assertTrue(all(s.correct() for s in solutions))
@@ -0,0 +1,73 @@
+import random
+import unittest
+
+import generator
+import sudoku
+from sudoku import Sudoku
+from test.test_sudoku import EASY, HARD, EVIL, HARDEST
+
+
+class TestGenerator(unittest.TestCase):
+
+    # grade
+    def test_grade(self):
+        self.assertEqual(generator.grade(Sudoku(EASY)), generator.EASY)
+        self.assertEqual(generator.grade(Sudoku(HARD)), generator.MEDIUM)
+        self.assertEqual(generator.grade(Sudoku(EVIL)), generator.EXPERT)
+        self.assertEqual(generator.grade(Sudoku(HARDEST, compact=True)), generator.EXPERT)
+
+    def test_grade_keeps_puzzle(self):
+        puzzle = Sudoku(EASY)
+        generator.grade(puzzle)
+        self.assertEqual(puzzle.board, EASY)
+
+    # full_grid
+    def test_full_grid(self):
+        for board_size in (4, 9, 16):
+            self.assertTrue(generator.full_grid(board_size, random.Random(0)).correct())
+
+    def test_full_grid_random(self):
+        grids = {str(generator.full_grid()) for _ in range(5)}
+        self.assertEqual(len(grids), 5)
+
+    # generate
+    def test_generate(self):
+        puzzle = generator.generate(seed=0)
+        self.assertTrue(sudoku.has_unique_solution(puzzle, sudoku.Propagator()))
+        self.assertFalse(puzzle.correct())
+
+    def test_generate_seed(self):
+        self.assertEqual(
+            generator.generate(difficulty=generator.EASY, seed=1).board,
+            generator.generate(difficulty=generator.EASY, seed=1).board,
+        )
+
+    def test_generate_difficulty(self):
+        for difficulty in (generator.EASY, generator.MEDIUM, generator.EXPERT):
+            puzzle = generator.generate(difficulty=difficulty, seed=2)
+            self.assertEqual(generator.grade(puzzle), difficulty)
+            self.assertEqual(sudoku.count_solutions(puzzle, 2, sudoku.Propagator()), 1)
+
+    def test_generate_4x4(self):
+        puzzle = generator.generate(4, seed=0)
+        self.assertEqual(puzzle.board_size, 4)
+        self.assertTrue(sudoku.has_unique_solution(puzzle))
+
+    def test_generate_unknown_difficulty(self):
+        with self.assertRaises(ValueError):
+            generator.generate(difficulty='impossible')
+
+    def test_generate_failed(self):
+        with self.assertRaises(generator.GenerationFailed):
+            generator.generate(difficulty=generator.EASY, attempts=0)
+
+    # generate_batch
+    def test_generate_batch(self):
+        puzzles = list(generator.generate_batch(4, 4, seed=0, processes=2))
+        self.assertEqual(len(puzzles), 4)
+        self.assertEqual(
+            [p.board for p in puzzles],
+            [p.board for p in generator.generate_batch(4, 4, seed=0, processes=1)],
+        )
+        for puzzle in puzzles:
+            self.assertTrue(sudoku.has_unique_solution(puzzle))
@@ -0,0 +1,82 @@
+import unittest
+
+import parallel
+import sudoku
+from sudoku import Sudoku
+from test.test_sudoku import EASY, HARDEST, IMPOSSIBLE, EASY_16x16, full_board
+
+
+class TestParallel(unittest.TestCase):
+
+    # split
+    def test_split(self):
+        boards = parallel.split(Sudoku(HARDEST), 8)
+        self.assertGreaterEqual(len(boards), 8)
+        counts = [
+            sudoku.count_solutions(Sudoku(board), propagator=sudoku.Propagator()) for board in boards
+        ]
+        self.assertEqual(sorted(counts), [0] * (len(boards) - 1) + [1])
+
+    def test_split_propagator(self):
+        propagator, strategy = sudoku.Propagator(), sudoku.MostConstrained()
+        boards = parallel.split(Sudoku(HARDEST), 8, propagator, strategy)
+        self.assertGreaterEqual(len(boards), 8)
+        solutions = [sudoku.solve(Sudoku(board), propagator) for board in boards]
+        self.assertEqual(len([solution for solution in solutions if solution]), 1)
+
+    def test_split_filled(self):
+        board = full_board(2)
+        self.assertEqual(parallel.split(Sudoku(board), 8), [board])
+
+    def test_split_impossible(self):
+        self.assertEqual(parallel.split(Sudoku(IMPOSSIBLE), 8, sudoku.Propagator()), [])
+
+    def test_split_empty(self):
+        boards = parallel.split(Sudoku([[None] * 4] * 4), 5)
+        # The 4 possibilities of the first cell, then the 3 of the second cell of the first board
+        self.assertEqual(
+            [board[0][:2] for board in boards],
+            [[1, 2], [1, 3], [1, 4], [2, None], [3, None], [4, None]],
+        )
+        self.assertEqual(sum(sudoku.count_solutions(Sudoku(board)) for board in boards), 288)
+
+    # solve
+    def test_solve(self):
+        puzzle = Sudoku(HARDEST)
+        solution = parallel.solve(puzzle, processes=2)
+        self.assertTrue(solution.correct())
+        self.assertEqual(solution.unmodifiable_cells, puzzle.unmodifiable_cells)
+        self.assertEqual(solution.board, sudoku.solve(puzzle).board)
+
+    def test_solve_propagator(self):
+        solution = parallel.solve(
+            Sudoku(EASY_16x16, compact=True), sudoku.Propagator(), sudoku.MostConstrained(),
+            processes=2,
+        )
+        self.assertIsInstance(solution, sudoku.CompactSudoku)
+        self.assertTrue(solution.correct())
+
+    def test_solve_in_process(self):
+        self.assertTrue(parallel.solve(Sudoku(EASY), processes=1, subtrees=3).correct())
+
+    def test_solve_impossible(self):
+        self.assertIsNone(parallel.solve(Sudoku(IMPOSSIBLE), processes=2))
+        self.assertIsNone(parallel.solve(Sudoku(IMPOSSIBLE), sudoku.Propagator(), processes=2))
+
+    # count_solutions
+    def test_count_solutions(self):
+        empty = Sudoku([[None] * 4] * 4)
+        self.assertEqual(parallel.count_solutions(empty, processes=2), 288)
+        self.assertEqual(parallel.count_solutions(empty, processes=1, subtrees=7), 288)
+        self.assertEqual(parallel.count_solutions(empty, propagator=sudoku.Propagator(), processes=2), 288)
+
+    def test_count_solutions_limit(self):
+        empty = Sudoku([[None] * 4] * 4)
+        self.assertEqual(parallel.count_solutions(empty, 100, processes=2), 100)
+        self.assertEqual(parallel.count_solutions(empty, 1000, processes=2), 288)
+
+    # has_unique_solution
+    def test_has_unique_solution(self):
+        self.assertTrue(parallel.has_unique_solution(Sudoku(HARDEST), sudoku.Propagator(), processes=2))
+        self.assertFalse(parallel.has_unique_solution(Sudoku([[None] * 4] * 4), processes=2))
+        self.assertFalse(parallel.has_unique_solution(Sudoku(IMPOSSIBLE), processes=2))
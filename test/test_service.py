@@ -0,0 +1,198 @@
+import sys
+import threading
+import unittest
+
+if sys.version_info >= (3, 7):
+    import asyncio
+    import concurrent.futures
+
+    import service
+    from test.coroutines import first_result
+
+import batch
+import sudoku
+from sudoku import Sudoku
+from test.test_sudoku import EASY, MEDIUM, HARD, HARDEST, IMPOSSIBLE, INVALID_BOARD_INVALID_VALUE
+
+BOARDS = [EASY, INVALID_BOARD_INVALID_VALUE, HARD, IMPOSSIBLE, MEDIUM]
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'the service needs Python 3.7')
+class TestSolverService(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+
+    def run_async(self, awaitable):
+        return self.loop.run_until_complete(awaitable)
+
+    def collect(self, results):
+        collected = []
+        while True:
+            try:
+                collected.append(self.run_async(results.__anext__()))
+            except StopAsyncIteration:
+                return collected
+
+    def service(self, **kwargs):
+        solver_service = service.SolverService(**kwargs)
+        self.addCleanup(solver_service.close)
+        return solver_service
+
+    def check_results(self, results):
+        self.assertEqual(sorted(r.index for r in results), list(range(len(BOARDS))))
+        for result in results:
+            if result.index == 1:
+                self.assertIsInstance(result.error, sudoku.MalformedBoard)
+            elif result.index == 3:
+                self.assertIsInstance(result.error, batch.NoSolution)
+            else:
+                self.assertTrue(result.solution.correct())
+                self.assertEqual(
+                    result.solution.unmodifiable_cells,
+                    Sudoku(BOARDS[result.index]).unmodifiable_cells,
+                )
+
+    # solve
+    def test_solve(self):
+        solver_service = self.service(processes=2)
+        solved = self.run_async(solver_service.solve(Sudoku(HARD)))
+        self.assertTrue(solved.correct())
+        self.assertEqual(solved.unmodifiable_cells, Sudoku(HARD).unmodifiable_cells)
+
+    def test_solve_concurrently(self):
+        solver_service = self.service(processes=2)
+        solved = self.run_async(asyncio.gather(*[solver_service.solve(EASY) for _ in range(10)]))
+        self.assertTrue(all(s.correct() for s in solved))
+
+    def test_solve_impossible(self):
+        self.assertIsNone(self.run_async(self.service(processes=1).solve(IMPOSSIBLE)))
+
+    def test_solve_malformed(self):
+        solver_service = self.service(processes=1)
+        with self.assertRaises(sudoku.MalformedBoard):
+            self.run_async(solver_service.solve(INVALID_BOARD_INVALID_VALUE))
+
+    def test_solve_timeout(self):
+        solver_service = self.service(processes=1, timeout=0.01)
+        with self.assertRaises(asyncio.TimeoutError):
+            self.run_async(solver_service.solve(HARDEST))
+        # The worker stopped searching with the request
+        self.assertTrue(self.run_async(solver_service.solve(EASY, timeout=10)).correct())
+
+    def test_overloaded(self):
+        started, release = threading.Event(), threading.Event()
+
+        def solver(puzzle):
+            started.set()
+            release.wait()
+            return sudoku.solve(puzzle)
+
+        solver_service = self.service(
+            solver=solver, max_pending=1, queue_size=1,
+            executor=concurrent.futures.ThreadPoolExecutor(1),
+        )
+
+        # The first request is being solved, the second one waits
+        first = asyncio.ensure_future(solver_service.solve(EASY))
+        second = asyncio.ensure_future(solver_service.solve(EASY))
+        while not started.is_set():
+            self.run_async(asyncio.sleep(0.001))
+        with self.assertRaises(service.Overloaded):
+            self.run_async(solver_service.solve(EASY))
+        release.set()
+        self.assertTrue(all(s.correct() for s in self.run_async(asyncio.gather(first, second))))
+
+    def test_max_pending(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def solver(puzzle):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            try:
+                return sudoku.solve(puzzle)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        solver_service = self.service(
+            solver=solver, max_pending=2, executor=concurrent.futures.ThreadPoolExecutor(8),
+        )
+        self.run_async(asyncio.gather(*[solver_service.solve(MEDIUM) for _ in range(20)]))
+        self.assertLessEqual(running[1], 2)
+
+    # solve_batch
+    def test_solve_batch(self):
+        results = self.collect(self.service(processes=2).solve_batch(iter(BOARDS)))
+        self.assertEqual([r.index for r in results], list(range(len(BOARDS))))
+        self.check_results(results)
+
+    def test_solve_batch_unordered(self):
+        results = self.collect(self.service(processes=2).solve_batch(BOARDS * 3, ordered=False))
+        self.assertEqual(len(results), len(BOARDS) * 3)
+
+    def test_solve_batch_timeout(self):
+        results = self.collect(self.service(processes=1, timeout=0.01).solve_batch([HARDEST]))
+        self.assertIsInstance(results[0].error, batch.SearchStopped)
+
+    def test_solve_batch_closed(self):
+        started, release = threading.Event(), threading.Event()
+
+        def solver(puzzle):
+            started.set()
+            release.wait()
+            return sudoku.solve(puzzle)
+
+        solver_service = self.service(
+            solver=solver, max_pending=1, executor=concurrent.futures.ThreadPoolExecutor(2),
+        )
+        for _ in range(solver_service.max_pending + 1):
+            started.clear()
+            release.clear()
+            # The batch waits for the slot between two requests, so that its first board is solved
+            # and its second one is given the slot just before the batch is closed
+            requests = [asyncio.ensure_future(solver_service.solve(EASY))]
+            self.assertTrue(self.run_async(self.loop.run_in_executor(None, started.wait, 10)))
+            first = asyncio.ensure_future(first_result(solver_service.solve_batch([EASY] * 20)))
+            self.run_async(asyncio.sleep(0.01))
+            requests.append(asyncio.ensure_future(solver_service.solve(EASY)))
+            self.run_async(asyncio.sleep(0.01))
+            release.set()
+            self.assertEqual(self.run_async(asyncio.wait_for(first, 10)).index, 0)
+            self.run_async(asyncio.wait_for(asyncio.gather(*requests), 10))
+        self.assertTrue(self.run_async(asyncio.wait_for(solver_service.solve(EASY), 10)).correct())
+
+    # solve_async
+    def test_solve_async(self):
+        self.addCleanup(service.close_shared_service)
+        self.assertTrue(self.run_async(service.solve_async(EASY)).correct())
+        self.check_results(self.collect(service.solve_batch_async(BOARDS)))
+
+    def test_solve_async_loops(self):
+        self.addCleanup(service.close_shared_service)
+        # Enough requests to wait for a slot, in a loop closed before the workers are all done, then
+        # in another loop
+        self.addCleanup(asyncio.set_event_loop, self.loop)
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                solved = loop.run_until_complete(
+                    asyncio.gather(*[service.solve_async(MEDIUM) for _ in range(30)]),
+                )
+            finally:
+                loop.close()
+            self.assertTrue(all(s.correct() for s in solved))
+
+    def test_close_shared_service(self):
+        self.run_async(service.solve_async(EASY))
+        shared = service._service
+        service.close_shared_service()
+        self.assertIsNone(service._service)
+        self.assertTrue(self.run_async(service.solve_async(EASY)).correct())
+        self.assertIsNot(service._service, shared)
+        service.close_shared_service()
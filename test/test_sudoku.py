@@ -1,4 +1,17 @@
+import copy
+import inspect
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 import sudoku
 from sudoku import Sudoku
@@ -176,19 +189,43 @@ INVALID_BOARD_INVALID_VALUE = [
 ]
 
 
+def full_board(values_per_square):
+    """Return a correct board of the given square size."""
+    size = values_per_square ** 2
+    return [
+        [
+            (row * values_per_square + row // values_per_square + column) % size + 1
+            for column in range(size)
+        ]
+        for row in range(size)
+    ]
+
+
+def random_puzzle(values_per_square, empty_ratio, seed):
+    """Return the board of full_board() with a random part of its cells emptied."""
+    board = full_board(values_per_square)
+    rng = random.Random(seed)
+    for row in board:
+        for column in range(len(row)):
+            if rng.random() < empty_ratio:
+                row[column] = None
+    return board
+
+
 class TestSudoku(unittest.TestCase):
+    compact = False
 
     def setUp(self):
-        self.hardest = Sudoku(HARDEST)
-        self.easy = Sudoku(EASY)
-        self.medium = Sudoku(MEDIUM)
-        self.hard = Sudoku(HARD)
-        self.evil = Sudoku(EVIL)
-        self.correct = Sudoku(CORRECT)
-        self.incorrect = Sudoku(INCORRECT)
-        self.impossible = Sudoku(IMPOSSIBLE)
-        self.easy_4x4 = Sudoku(EASY_4x4)
-        self.easy_16x16 = Sudoku(EASY_16x16)
+        self.hardest = Sudoku(HARDEST, compact=self.compact)
+        self.easy = Sudoku(EASY, compact=self.compact)
+        self.medium = Sudoku(MEDIUM, compact=self.compact)
+        self.hard = Sudoku(HARD, compact=self.compact)
+        self.evil = Sudoku(EVIL, compact=self.compact)
+        self.correct = Sudoku(CORRECT, compact=self.compact)
+        self.incorrect = Sudoku(INCORRECT, compact=self.compact)
+        self.impossible = Sudoku(IMPOSSIBLE, compact=self.compact)
+        self.easy_4x4 = Sudoku(EASY_4x4, compact=self.compact)
+        self.easy_16x16 = Sudoku(EASY_16x16, compact=self.compact)
 
     # __init__
     def test_init_board_not_square_of_integer(self):
@@ -233,6 +270,168 @@ class TestSudoku(unittest.TestCase):
     def test_correct(self):
         self.assertTrue(self.correct.correct())
 
+    # set_cell / clear_cell
+    def test_set_cell(self):
+        self.easy.set_cell(0, 0, 4)
+        self.assertEqual(self.easy.board[0][0], 4)
+        self.assertEqual(self.easy.possibilities(0, 6), set())
+        self.assertEqual(self.easy.possibilities(0, 0), set([4, 6, 7, 8]))
+
+    def test_set_cell_conflict(self):
+        self.correct.set_cell(0, 0, 3)
+        self.assertFalse(self.correct.correct())
+        self.correct.set_cell(0, 0, 8)
+        self.assertTrue(self.correct.correct())
+
+    def test_clear_cell(self):
+        self.correct.clear_cell(4, 4)
+        self.assertIsNone(self.correct.board[4][4])
+        self.assertFalse(self.correct.correct())
+        self.assertEqual(self.correct.possibilities(4, 4), set([2]))
+
+    def test_clear_cell_conflict(self):
+        self.incorrect.clear_cell(0, 2)
+        self.incorrect.clear_cell(5, 2)
+        self.assertEqual(self.incorrect.possibilities(0, 2), set([2]))
+
+    # square_index
+    def test_square_index_9x9(self):
+        self.assertEqual([self.easy.square_index(r, r) for r in range(9)], [0, 0, 0, 4, 4, 4, 8, 8, 8])
+
+    def test_square_index_16x16(self):
+        self.assertEqual(self.easy_16x16.square_index(7, 8), 6)
+
+    # copy
+    def test_copy(self):
+        copied = self.easy.copy()
+        self.assertIsInstance(copied, type(self.easy))
+        self.assertEqual(copied.board, EASY)
+        copied.set_cell(0, 0, 8)
+        self.assertEqual(self.easy.cell(0, 0), None)
+        self.assertEqual(self.easy.possibilities(1, 0), {1, 4, 5, 6, 7, 8})
+        self.assertEqual(copied.possibilities(1, 0), {1, 4, 5, 6, 7})
+        self.assertEqual(copied.unmodifiable_cells, self.easy.unmodifiable_cells)
+
+    def test_copy_module(self):
+        copied = copy.copy(self.hardest)
+        self.assertIsNot(copied, self.hardest)
+        self.assertEqual(copied.board, HARDEST)
+
+    def test_copy_filled_cells(self):
+        self.easy.set_cell(0, 0, 8)
+        copied = self.easy.copy()
+        self.assertEqual(copied.cell(0, 0), 8)
+        self.assertTrue(copied.modifiable(0, 0))
+        self.assertTrue(sudoku.solve(copied).correct())
+        self.assertTrue(sudoku.solve(copied).modifiable(0, 0))
+
+    def test_copy_correct(self):
+        solved = sudoku.solve(self.easy)
+        self.assertTrue(solved.copy().correct())
+        copied = self.incorrect.copy()
+        self.assertFalse(copied.correct())
+
+    # filled
+    def test_filled(self):
+        solution = sudoku.solve(self.easy).board
+        filled = self.easy.filled(solution)
+        self.assertIsInstance(filled, type(self.easy))
+        self.assertEqual(filled.board, solution)
+        self.assertTrue(filled.correct())
+        self.assertEqual(filled.unmodifiable_cells, self.easy.unmodifiable_cells)
+        self.assertEqual(self.easy.board, EASY)
+
+    def test_filled_keeps_givens(self):
+        board = [[1] * 9 for _ in range(9)]
+        filled = self.easy.filled(board)
+        self.assertEqual(filled.cell(0, 2), EASY[0][2])
+        self.assertEqual(filled.cell(0, 0), 1)
+
+    # mark and rollback
+    def test_rollback(self):
+        mark = self.easy.mark()
+        self.easy.set_cell(0, 0, 4)
+        self.easy.set_cell(0, 0, 6)
+        self.easy.clear_cell(0, 1)
+        self.easy.set_cell(1, 0, 4)
+        self.easy.rollback(mark)
+        self.assertEqual(self.easy.board, EASY)
+        self.assertEqual(self.easy.possibilities(1, 0), {1, 4, 5, 6, 7, 8})
+        self.assertEqual(self.easy.candidate_count(0, 0), 4)
+
+    def test_rollback_nested(self):
+        outer = self.easy.mark()
+        self.easy.set_cell(0, 0, 4)
+        inner = self.easy.mark()
+        self.easy.set_cell(0, 7, 6)
+        self.easy.rollback(inner)
+        self.assertEqual(self.easy.cell(0, 0), 4)
+        self.assertEqual(self.easy.cell(0, 7), None)
+        self.easy.set_cell(0, 7, 7)
+        self.easy.rollback(outer)
+        self.assertEqual(self.easy.board, EASY)
+
+    def test_rollback_same_position(self):
+        outer = self.easy.mark()
+        inner = self.easy.mark()
+        self.assertEqual(outer, inner)
+        self.easy.set_cell(0, 0, 4)
+        self.easy.rollback(inner)
+        self.assertEqual(self.easy.cell(0, 0), None)
+        self.easy.set_cell(0, 7, 6)
+        self.easy.rollback(outer)
+        self.assertEqual(self.easy.board, EASY)
+
+    def test_rollback_again(self):
+        mark = self.easy.mark()
+        self.easy.set_cell(0, 0, 4)
+        self.easy.rollback(mark)
+        # A new mark records the changes again
+        mark = self.easy.mark()
+        self.easy.set_cell(0, 7, 6)
+        self.easy.rollback(mark)
+        self.assertEqual(self.easy.board, EASY)
+
+    def test_rollback_closes_inner_marks(self):
+        outer = self.easy.mark()
+        self.easy.set_cell(0, 0, 4)
+        self.easy.mark()
+        self.easy.set_cell(0, 7, 6)
+        self.easy.rollback(outer)
+        self.assertEqual(self.easy.board, EASY)
+        # All the marks are closed, the changes aren't recorded anymore
+        self.assertIsNone(self.easy._undo_log)
+        self.easy.set_cell(0, 0, 4)
+        self.easy.rollback(outer)
+        self.assertEqual(self.easy.cell(0, 0), 4)
+
+    def test_rollback_solution(self):
+        mark = self.hardest.mark()
+        solved = sudoku.solve(self.hardest)
+        for row in range(9):
+            for column in range(9):
+                self.hardest.set_cell(row, column, solved.cell(row, column))
+        self.assertTrue(self.hardest.correct())
+        self.hardest.rollback(mark)
+        self.assertEqual(self.hardest.board, HARDEST)
+        self.assertFalse(self.hardest.correct())
+
+    # tables
+    def test_tables_shared(self):
+        self.assertIs(self.easy._tables, self.hardest._tables)
+        self.assertIs(self.easy._tables, Sudoku(EASY, not self.compact)._tables)
+        self.assertIsNot(self.easy._tables, self.easy_16x16._tables)
+
+    def test_tables_peers(self):
+        peers = self.easy._tables.peers
+        self.assertEqual(len(peers), 81)
+        self.assertEqual(len(peers[4, 4]), 20)
+        self.assertEqual(
+            set(peers[0, 0]),
+            {(0, c) for c in range(1, 9)} | {(r, 0) for r in range(1, 9)}
+            | {(1, 1), (1, 2), (2, 1), (2, 2)},
+        )
+
     # square_coordinates
     def test_9x9_00(self):
         self.assertEqual(
@@ -275,6 +474,73 @@ class TestSudoku(unittest.TestCase):
     def test_multiple_possibilities(self):
         self.assertEqual(self.easy.possibilities(0, 0), set([4, 6, 7, 8]))
 
+    # candidate_count
+    def test_candidate_count(self):
+        self.assertEqual(self.easy.candidate_count(0, 0), 4)
+        self.assertEqual(self.incorrect.candidate_count(0, 2), 0)
+
+    # RowMajor
+    def test_row_major_select_cell(self):
+        strategy = sudoku.RowMajor()
+        self.assertEqual(strategy.select_cell(self.easy, None, None), (0, 0))
+        self.assertEqual(strategy.select_cell(self.easy, None, (0, 0)), (0, 6))
+        self.assertEqual(strategy.select_cell(self.easy, None, (8, 8)), None)
+        self.assertEqual(strategy.select_cell(self.correct, None, None), None)
+
+    def test_row_major_order_values(self):
+        strategy = sudoku.RowMajor()
+        self.assertEqual(strategy.order_values(self.easy, None, 0, 0, {8, 4, 7, 6}), [4, 6, 7, 8])
+
+    def test_least_constraining_value(self):
+        strategy = sudoku.RowMajor(least_constraining_value=True)
+        # 8 is only a possibility of (0, 0) in its row, column and square
+        self.assertEqual(strategy.order_values(self.easy, None, 0, 0, {4, 6, 7, 8})[0], 8)
+
+    # MostConstrained
+    def test_most_constrained_select_cell(self):
+        strategy = sudoku.MostConstrained()
+        row, column = strategy.select_cell(self.easy, None, None)
+        self.assertEqual(self.easy.candidate_count(row, column), 1)
+        self.assertEqual(strategy.select_cell(self.correct, None, None), None)
+
+    def test_most_constrained_select_cell_candidates(self):
+        strategy = sudoku.MostConstrained()
+        candidates = {(0, 0): {1, 2}, (1, 1): {1, 2, 3}, (8, 8): {1, 2}}
+        # (0, 0) and (8, 8) have as many candidates, but (0, 0) has more empty peers
+        self.assertEqual(strategy.select_cell(self.easy, candidates, None), (0, 0))
+
+    # Propagator
+    def test_propagate_easy(self):
+        self.assertEqual(sudoku.Propagator().propagate(self.easy), {})
+        self.assertTrue(self.easy.correct())
+
+    def test_propagate_hard(self):
+        self.assertEqual(sudoku.Propagator().propagate(self.hard), {})
+        self.assertTrue(self.hard.correct())
+
+    def test_propagate_hard_singles_only(self):
+        propagator = sudoku.Propagator([sudoku.NAKED_SINGLES, sudoku.HIDDEN_SINGLES])
+        candidates = propagator.propagate(self.hard)
+        self.assertEqual(len(candidates), 31)
+        for (row, column), possibilities in candidates.items():
+            self.assertIsNone(self.hard.cell(row, column))
+            self.assertTrue(possibilities <= self.hard.possibilities(row, column))
+
+    def test_propagate_impossible(self):
+        self.assertIsNone(sudoku.Propagator().propagate(self.impossible))
+        self.assertEqual(self.impossible.board, IMPOSSIBLE)
+
+    def test_assign_contradiction(self):
+        propagator = sudoku.Propagator()
+        candidates = propagator.propagate(self.hardest)
+        board = self.hardest.board
+        self.assertIsNone(propagator.assign(self.hardest, candidates, 0, 3, 3))
+        self.assertEqual(self.hardest.board, board)
+
+    def test_unknown_technique(self):
+        with self.assertRaises(ValueError):
+            sudoku.Propagator(['x-wing'])
+
     # __str__
     def test_str_not_fully_filled(self):
         self.assertEqual(str(self.easy), '\n'.join([
@@ -362,3 +628,321 @@ class TestSudoku(unittest.TestCase):
     def test_solve_easy_16x16(self):
         solved = sudoku.solve(self.easy_16x16)
         self.assertTrue(solved.correct())
+
+    def test_solve_36x36_without_recursion(self):
+        puzzle = Sudoku(random_puzzle(6, 0.3, 6), self.compact)
+        stats = sudoku.SearchStats()
+        limit = sys.getrecursionlimit()
+        # Far less than the number of nested guesses
+        sys.setrecursionlimit(len(inspect.stack()) + 50)
+        try:
+            solved = sudoku.solve(puzzle, stats=stats)
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertTrue(solved.correct())
+        self.assertGreater(stats.max_depth, 100)
+
+    def test_solve_49x49(self):
+        puzzle = Sudoku(random_puzzle(7, 0.2, 7), self.compact)
+        propagator = sudoku.Propagator((sudoku.NAKED_SINGLES, sudoku.HIDDEN_SINGLES))
+        solved = sudoku.solve(puzzle, propagator, sudoku.MostConstrained())
+        self.assertTrue(solved.correct())
+
+    def test_solve_with_propagator(self):
+        propagator = sudoku.Propagator()
+        for puzzle in (self.easy, self.medium, self.hard, self.evil, self.hardest, self.easy_16x16):
+            self.assertTrue(sudoku.solve(puzzle, propagator).correct())
+
+    def test_solve_with_strategies(self):
+        strategies = (
+            sudoku.MostConstrained(),
+            sudoku.MostConstrained(least_constraining_value=True),
+        )
+        for strategy in strategies:
+            for propagator in (None, sudoku.Propagator()):
+                for puzzle in (self.easy, self.evil, self.hardest, self.easy_16x16):
+                    self.assertTrue(sudoku.solve(puzzle, propagator, strategy).correct())
+                self.assertIsNone(sudoku.solve(self.impossible, propagator, strategy))
+
+    def test_solve_least_constraining_value(self):
+        strategy = sudoku.RowMajor(least_constraining_value=True)
+        self.assertTrue(sudoku.solve(self.easy, strategy=strategy).correct())
+        self.assertTrue(sudoku.solve(self.hardest, sudoku.Propagator(), strategy).correct())
+
+    def test_solve_impossible_with_propagator(self):
+        self.assertIsNone(sudoku.solve(self.impossible, sudoku.Propagator()))
+
+    # solve with limits
+    def test_solve_max_nodes(self):
+        interrupted = sudoku.solve(self.hardest, max_nodes=10)
+        self.assertIsInstance(interrupted, sudoku.Interrupted)
+        self.assertFalse(interrupted)
+        self.assertEqual(interrupted.reason, sudoku.NODE_LIMIT)
+        self.assertEqual(self.hardest.board, HARDEST)
+
+    def test_solve_timeout(self):
+        interrupted = sudoku.solve(self.hardest, timeout=0)
+        self.assertFalse(interrupted)
+        self.assertEqual(interrupted.reason, sudoku.TIMEOUT)
+
+    def test_solve_cancel(self):
+        cancel = threading.Event()
+        stats = sudoku.SearchStats(on_assign=lambda *guess: cancel.set())
+        interrupted = sudoku.solve(self.hardest, stats=stats, cancel=cancel)
+        self.assertEqual(interrupted.reason, sudoku.CANCELLED)
+        self.assertEqual(stats.nodes, 1)
+
+    def test_solve_within_limits(self):
+        solved = sudoku.solve(self.easy, timeout=60, max_nodes=1000, cancel=threading.Event())
+        self.assertTrue(solved.correct())
+        self.assertIsNone(sudoku.solve(self.impossible, max_nodes=1000))
+
+    # resume
+    def test_resume(self):
+        stats = sudoku.SearchStats()
+        expected = sudoku.solve(self.hardest, stats=stats)
+
+        resumed_stats = sudoku.SearchStats()
+        result = sudoku.solve(self.hardest, stats=resumed_stats, max_nodes=1000)
+        resumes = 0
+        while isinstance(result, sudoku.Interrupted):
+            result = sudoku.resume(result, stats=resumed_stats, max_nodes=1000)
+            resumes += 1
+        self.assertGreater(resumes, 10)
+        self.assertEqual(result.board, expected.board)
+        self.assertIsInstance(result, type(self.hardest))
+        self.assertFalse(result.modifiable(0, 0))
+        self.assertTrue(result.modifiable(0, 1))
+        # No work is lost or done twice
+        self.assertEqual(resumed_stats.nodes, stats.nodes)
+
+    def test_resume_with_propagator(self):
+        propagator = sudoku.Propagator()
+        strategy = sudoku.MostConstrained()
+        expected = sudoku.solve(self.hardest, propagator, strategy)
+        result = sudoku.solve(self.hardest, propagator, strategy, max_nodes=1)
+        while isinstance(result, sudoku.Interrupted):
+            result = sudoku.resume(result, max_nodes=1)
+        self.assertEqual(result.board, expected.board)
+
+    def test_resume_twice(self):
+        interrupted = sudoku.solve(self.hardest, max_nodes=100)
+        first = sudoku.resume(interrupted, max_nodes=200)
+        second = sudoku.resume(interrupted, max_nodes=200)
+        self.assertEqual(first.checkpoint.board, second.checkpoint.board)
+        self.assertTrue(sudoku.resume(interrupted).correct())
+
+    def test_resume_pickled(self):
+        interrupted = sudoku.solve(self.hardest, sudoku.Propagator(), max_nodes=2)
+        restored = pickle.loads(pickle.dumps(interrupted, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(restored.reason, sudoku.NODE_LIMIT)
+        self.assertTrue(sudoku.resume(restored).correct())
+
+    def test_resume_impossible(self):
+        board = [row[:] for row in HARDEST]
+        board[0][1] = 3
+        interrupted = sudoku.solve(Sudoku(board, self.compact), max_nodes=10)
+        self.assertEqual(interrupted.reason, sudoku.NODE_LIMIT)
+        self.assertIsNone(sudoku.resume(interrupted))
+
+    # count_solutions
+    def test_count_solutions_unique(self):
+        self.assertEqual(sudoku.count_solutions(self.easy), 1)
+        self.assertEqual(sudoku.count_solutions(self.evil, propagator=sudoku.Propagator()), 1)
+
+    def test_count_solutions_impossible(self):
+        self.assertEqual(sudoku.count_solutions(self.impossible), 0)
+        self.assertEqual(sudoku.count_solutions(self.impossible, propagator=sudoku.Propagator()), 0)
+
+    def test_count_solutions_empty_4x4(self):
+        self.assertEqual(sudoku.count_solutions(Sudoku([[None] * 4] * 4, self.compact)), 288)
+
+    def test_count_solutions_limit(self):
+        empty = Sudoku([[None] * 9] * 9, self.compact)
+        self.assertEqual(sudoku.count_solutions(empty, limit=2), 2)
+        self.assertEqual(sudoku.count_solutions(empty, limit=0), 0)
+
+    def test_count_solutions_two(self):
+        board = [row[:] for row in EVIL]
+        board[0][3] = None
+        puzzle = Sudoku(board, self.compact)
+        strategy = sudoku.MostConstrained()
+        self.assertEqual(sudoku.count_solutions(puzzle, None, sudoku.Propagator(), strategy), 2)
+        self.assertEqual(sudoku.count_solutions(puzzle, 1, sudoku.Propagator(), strategy), 1)
+
+    def test_count_solutions_keeps_sudoku(self):
+        sudoku.count_solutions(self.easy)
+        self.assertEqual(self.easy.board, EASY)
+
+    # has_unique_solution
+    def test_has_unique_solution(self):
+        self.assertTrue(sudoku.has_unique_solution(self.hard, sudoku.Propagator()))
+        self.assertFalse(sudoku.has_unique_solution(self.impossible))
+        self.assertFalse(sudoku.has_unique_solution(Sudoku([[None] * 4] * 4, self.compact)))
+
+    # SearchStats
+    def test_search_stats(self):
+        stats = sudoku.SearchStats()
+        self.assertIsNotNone(sudoku.solve(self.medium, stats=stats))
+        self.assertGreater(stats.nodes, 0)
+        self.assertGreater(stats.backtracks, 0)
+        self.assertGreater(stats.possibilities_calls, 0)
+        self.assertGreater(stats.max_depth, 0)
+        self.assertGreater(stats.candidates_seconds, 0)
+        self.assertGreater(stats.selection_seconds, 0)
+        self.assertGreater(stats.validity_seconds, 0)
+
+    def test_search_stats_with_propagator(self):
+        stats = sudoku.SearchStats()
+        self.assertIsNotNone(sudoku.solve(self.easy, sudoku.Propagator(), stats=stats))
+        # The easy puzzle is solved by deduction only
+        self.assertEqual(stats.nodes, 1)
+        self.assertEqual(stats.backtracks, 0)
+        self.assertEqual(stats.max_depth, 0)
+        self.assertEqual(stats.possibilities_calls, 0)
+        self.assertGreater(stats.candidates_seconds, 0)
+
+    def test_search_stats_callbacks(self):
+        events = []
+        stats = sudoku.SearchStats(
+            on_assign=lambda *guess: events.append(('assign',) + guess),
+            on_undo=lambda *guess: events.append(('undo',) + guess),
+        )
+        empty = Sudoku([[None] * 4] * 4, self.compact)
+        self.assertEqual(sudoku.count_solutions(empty, stats=stats), 288)
+        assigned = [e[1:] for e in events if e[0] == 'assign']
+        undone = [e[1:] for e in events if e[0] == 'undo']
+        # Every guess is undone once all the solutions are found
+        self.assertEqual(sorted(assigned), sorted(undone))
+        self.assertEqual(len(undone), stats.backtracks)
+        self.assertEqual(max(depth for _, _, _, depth in assigned), stats.max_depth)
+        self.assertEqual(stats.max_depth, 16)
+
+    def test_search_stats_as_dict(self):
+        stats = sudoku.SearchStats()
+        sudoku.solve(self.easy, stats=stats)
+        counters = stats.as_dict()
+        self.assertEqual(counters['nodes'], stats.nodes)
+        self.assertEqual(sorted(counters), [
+            'backtracks', 'candidates_seconds', 'max_depth', 'nodes', 'possibilities_calls',
+            'selection_seconds', 'validity_seconds',
+        ])
+
+
+class TestPuzzleFormat(unittest.TestCase):
+
+    HARDEST_LINE = '8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..'
+
+    def test_parse_puzzle(self):
+        self.assertEqual(sudoku.parse_puzzle(self.HARDEST_LINE + '\n'), HARDEST)
+        self.assertEqual(sudoku.parse_puzzle(self.HARDEST_LINE.replace('.', '0')), HARDEST)
+
+    def test_parse_puzzle_letters(self):
+        line = sudoku.format_puzzle(EASY_16x16)
+        self.assertEqual(line[:16], '.3.D5..24..CA.1.')
+        self.assertEqual(sudoku.parse_puzzle(line), EASY_16x16)
+        self.assertEqual(sudoku.parse_puzzle(line.lower()), EASY_16x16)
+
+    def test_parse_puzzle_separators(self):
+        self.assertEqual(sudoku.parse_puzzle('3 4 1 . . 2 . . . . 2 . . 1 4 3'), EASY_4x4)
+        self.assertEqual(sudoku.parse_puzzle('3,4,1,0,0,2,0,0,0,0,2,0,0,1,4,3'), EASY_4x4)
+
+    def test_parse_puzzle_blank(self):
+        self.assertIsNone(sudoku.parse_puzzle('   \n'))
+        self.assertIsNone(sudoku.parse_puzzle('# comment'))
+
+    def test_parse_puzzle_malformed(self):
+        with self.assertRaises(sudoku.MalformedBoard):
+            sudoku.parse_puzzle(self.HARDEST_LINE[:-1])
+        with self.assertRaises(sudoku.MalformedBoard):
+            sudoku.parse_puzzle('123?')
+
+    def test_format_puzzle(self):
+        self.assertEqual(sudoku.format_puzzle(Sudoku(HARDEST)), self.HARDEST_LINE)
+
+    def test_format_puzzle_large(self):
+        board = [[None] * 36 for _ in range(36)]
+        board[0][0] = 36
+        line = sudoku.format_puzzle(board)
+        self.assertTrue(line.startswith('36 . .'))
+        self.assertEqual(sudoku.parse_puzzle(line), board)
+
+    def test_read_puzzles(self):
+        lines = iter(['# Puzzles', self.HARDEST_LINE, '', sudoku.format_puzzle(EASY_4x4)])
+        self.assertEqual(list(sudoku.read_puzzles(lines)), [HARDEST, EASY_4x4])
+
+    def test_read_puzzles_malformed(self):
+        with self.assertRaises(sudoku.MalformedBoard) as context:
+            list(sudoku.read_puzzles([self.HARDEST_LINE, '12']))
+        self.assertIn('Line 2', str(context.exception))
+
+    def test_write_puzzles(self):
+        output = StringIO()
+        sudoku.write_puzzles([Sudoku(HARDEST), EASY_4x4], output)
+        self.assertEqual(output.getvalue(), self.HARDEST_LINE + '\n341..2....2..143\n')
+
+    # main
+    def run_main(self, argv, stdin=''):
+        stdout, stderr = StringIO(), StringIO()
+        status = sudoku.main(argv, StringIO(stdin), stdout, stderr)
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_main(self):
+        status, stdout, stderr = self.run_main([], self.HARDEST_LINE + '\n')
+        self.assertEqual(status, 0)
+        self.assertTrue(Sudoku(sudoku.parse_puzzle(stdout)).correct())
+        self.assertIn('Solved 1 of 1 puzzles', stderr)
+
+    def test_main_file(self):
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join([self.HARDEST_LINE, sudoku.format_puzzle(IMPOSSIBLE), '123', '']))
+        try:
+            status, stdout, stderr = self.run_main([path, '--engine', 'dlx', '-j', '2'])
+        finally:
+            os.remove(path)
+        self.assertEqual(status, 1)
+        self.assertEqual(len(stdout.splitlines()), 1)
+        self.assertIn('Line 3:', stderr)
+        self.assertIn('Puzzle 2: The board has no solution', stderr)
+        self.assertIn('Solved 1 of 2 puzzles', stderr)
+
+    def test_main_propagate(self):
+        argv = ['--propagate', '--strategy', 'most-constrained']
+        status, stdout, _ = self.run_main(argv, sudoku.format_puzzle(EASY_16x16))
+        self.assertEqual(status, 0)
+        self.assertTrue(Sudoku(sudoku.parse_puzzle(stdout)).correct())
+
+
+class TestImport(unittest.TestCase):
+
+    def test_no_heavy_imports(self):
+        # Short-lived processes pay for every module imported with the sudoku module
+        script = (
+            'import sys, sudoku; '
+            'sudoku.solve(sudoku.Sudoku([[None] * 4] * 4)); '
+            'print(" ".join(m for m in ("array", "argparse", "multiprocessing", "numpy") '
+            'if m in sys.modules))'
+        )
+        directory = os.path.dirname(os.path.abspath(sudoku.__file__))
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=directory)
+        self.assertEqual(output.split(), [])
+
+
+class TestCompactSudoku(TestSudoku):
+    compact = True
+
+    def test_compact(self):
+        self.assertIsInstance(self.easy, sudoku.CompactSudoku)
+        self.assertIsInstance(self.easy, Sudoku)
+
+    def test_board_view(self):
+        self.assertEqual(self.easy.board, EASY)
+
+    def test_unmodifiable_cells(self):
+        self.assertEqual(self.easy_4x4.unmodifiable_cells, {
+            (0, 0), (0, 1), (0, 2), (1, 1), (2, 2), (3, 1), (3, 2), (3, 3),
+        })
+
+    def test_solve_keeps_representation(self):
+        self.assertIsInstance(sudoku.solve(self.easy), sudoku.CompactSudoku)
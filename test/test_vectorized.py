@@ -0,0 +1,114 @@
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+else:
+    import vectorized
+
+from sudoku import Sudoku
+from test.test_sudoku import (
+    EASY, HARDEST, CORRECT, INCORRECT, IMPOSSIBLE, EASY_4x4, EASY_16x16,
+    INVALID_BOARD_INVALID_VALUE, full_board,
+)
+
+BOARDS = [EASY, HARDEST, CORRECT, INCORRECT, IMPOSSIBLE, INVALID_BOARD_INVALID_VALUE]
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class TestVectorized(unittest.TestCase):
+
+    def setUp(self):
+        self.boards = vectorized.as_array(BOARDS)
+
+    # as_array
+    def test_as_array(self):
+        boards = vectorized.as_array([Sudoku(EASY), EASY])
+        self.assertEqual(boards.shape, (2, 9, 9))
+        self.assertEqual(boards[0, 0, 0], 0)
+        self.assertEqual(boards[1, 0, 1], 3)
+
+    # malformed
+    def test_malformed(self):
+        self.assertEqual(
+            vectorized.malformed(self.boards).tolist(), [False] * 5 + [True],
+        )
+        self.assertTrue(vectorized.malformed(-vectorized.as_array([EASY])).all())
+
+    def test_malformed_size(self):
+        self.assertTrue(vectorized.malformed(numpy.zeros((2, 5, 5), dtype=int)).all())
+
+    def test_not_an_integer_array(self):
+        self.assertRaises(TypeError, vectorized.correct, numpy.zeros((1, 9, 9)))
+
+    def test_not_a_batch_of_boards(self):
+        self.assertRaises(ValueError, vectorized.correct, numpy.zeros((9, 9), dtype=int))
+
+    # correct
+    def test_correct(self):
+        self.assertEqual(
+            vectorized.correct(self.boards[:5]).tolist(),
+            [Sudoku(board).correct() for board in BOARDS[:5]],
+        )
+
+    def test_correct_sizes(self):
+        for values_per_square in (2, 4, 5):
+            boards = vectorized.as_array([full_board(values_per_square)])
+            self.assertTrue(vectorized.correct(boards)[0])
+        self.assertFalse(vectorized.correct(vectorized.as_array([EASY_16x16]))[0])
+
+    def test_chunks(self):
+        boards = numpy.concatenate([self.boards[:5]] * 3)
+        original, vectorized.CHUNK_SIZE = vectorized.CHUNK_SIZE, 4
+        try:
+            self.assertEqual(
+                vectorized.correct(boards).tolist(), [False, False, True, False, False] * 3,
+            )
+        finally:
+            vectorized.CHUNK_SIZE = original
+
+    def test_too_large(self):
+        boards = numpy.zeros((1, 64, 64), dtype=int)
+        for function in (vectorized.correct, vectorized.conflicting, vectorized.candidate_masks):
+            self.assertRaises(ValueError, function, boards)
+        self.assertFalse(vectorized.malformed(boards)[0])
+
+    def test_largest_size(self):
+        boards = vectorized.as_array([full_board(7)])
+        self.assertTrue(vectorized.correct(boards)[0])
+        self.assertEqual(vectorized.candidate_counts(boards).sum(), 49 * 49)
+
+    def test_empty_batch(self):
+        self.assertEqual(vectorized.correct(numpy.zeros((0, 9, 9), dtype=int)).shape, (0,))
+
+    # conflicting
+    def test_conflicting(self):
+        self.assertEqual(
+            vectorized.conflicting(self.boards[:5]).tolist(), [False, False, False, True, False],
+        )
+
+    # candidate_masks
+    def test_candidate_masks(self):
+        masks = vectorized.candidate_masks(self.boards[:5])
+        for i, board in enumerate(BOARDS[:5]):
+            sudoku = Sudoku(board, compact=True)
+            for row in range(9):
+                for column in range(9):
+                    self.assertEqual(masks[i, row, column], sudoku.candidate_mask(row, column))
+
+    def test_candidate_masks_16x16(self):
+        masks = vectorized.candidate_masks(vectorized.as_array([EASY_16x16]))
+        sudoku = Sudoku(EASY_16x16, compact=True)
+        for row in range(16):
+            for column in range(16):
+                self.assertEqual(masks[0, row, column], sudoku.candidate_mask(row, column))
+
+    # candidate_counts
+    def test_candidate_counts(self):
+        for board in (EASY, EASY_4x4):
+            counts = vectorized.candidate_counts(vectorized.as_array([board]))
+            sudoku = Sudoku(board)
+            for row in range(len(board)):
+                for column in range(len(board)):
+                    self.assertEqual(counts[0, row, column], sudoku.candidate_count(row, column))
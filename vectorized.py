@@ -0,0 +1,164 @@
+"""Checks of batches of boards stored in NumPy integer arrays.
+
+The values of the cells are handled as bits of int64 masks, so boards of more than MAX_BOARD_SIZE
+rows, like 64x64 ones, are rejected with ValueError by every function but as_array() and
+malformed().
+"""
+import numpy
+
+from sudoku import Sudoku
+
+# Number of boards processed at once, to bound the memory used by the intermediate arrays
+CHUNK_SIZE = 4096
+# Largest board size whose values all fit in the bits of an int64 mask, bit 0 being unused
+MAX_BOARD_SIZE = 62
+
+
+def as_array(boards):
+    """Return an (N, n, n) integer array of an iterable of boards or Sudoku instances.
+
+    Empty cells are 0. All the boards must have the same size.
+    """
+    return numpy.array([
+        [[value or 0 for value in row] for row in (b.board if isinstance(b, Sudoku) else b)]
+        for b in boards
+    ], dtype=numpy.int64)
+
+
+def malformed(boards):
+    """Return which boards of an (N, n, n) integer array Sudoku() would reject with MalformedBoard.
+
+    They are the boards having a value other than 0 to n, or all of them if n isn't the square of
+    an integer.
+    """
+    boards = _checked(boards)
+    size = boards.shape[1]
+    if int(round(size ** 0.5)) ** 2 != size:
+        return numpy.ones(len(boards), dtype=bool)
+    return ((boards < 0) | (boards > size)).any(axis=(1, 2))
+
+
+def correct(boards):
+    """Return which boards of an (N, n, n) integer array are correctly solved, as a boolean array.
+
+    They are the boards whose rows, columns and squares contain each value exactly once, like
+    Sudoku.correct().
+    """
+    return _map(_correct, boards)
+
+
+def conflicting(boards):
+    """Return which boards of an (N, n, n) integer array have the same value twice in a row, a
+    column or a square, as a boolean array. Such boards have no solution.
+    """
+    return _map(_conflicting, boards)
+
+
+def candidate_masks(boards):
+    """Return the valid possibilities of the cells of an (N, n, n) integer array, as bitmasks.
+
+    Bit v of the mask of a cell is set if the value v is possible in the cell, like
+    CompactSudoku.candidate_mask(). The masks of malformed boards are meaningless.
+    """
+    return _map(_candidate_masks, boards)
+
+
+def candidate_counts(boards):
+    """Return the number of valid possibilities of the cells of an (N, n, n) integer array."""
+    return _map(_candidate_counts, boards)
+
+
+def _checked(boards):
+    boards = numpy.asarray(boards)
+    if boards.ndim != 3 or boards.shape[1] != boards.shape[2]:
+        raise ValueError('Expected an (N, n, n) array, got shape {}'.format(boards.shape))
+    if not numpy.issubdtype(boards.dtype, numpy.integer):
+        raise TypeError('Expected an integer array, got {}'.format(boards.dtype))
+    return boards
+
+
+def _map(function, boards):
+    boards = _checked(boards)
+    if boards.shape[1] > MAX_BOARD_SIZE:
+        raise ValueError('Boards of more than {} rows are not supported, got {}'.format(
+            MAX_BOARD_SIZE, boards.shape[1],
+        ))
+    if len(boards) <= CHUNK_SIZE:
+        return function(boards)
+    return numpy.concatenate([
+        function(boards[start:start + CHUNK_SIZE]) for start in range(0, len(boards), CHUNK_SIZE)
+    ])
+
+
+def _bits(boards):
+    """Return the boards with each value v replaced by 1 << v, and the empty cells by 0."""
+    size = boards.shape[1]
+    valid = (boards > 0) & (boards <= size)
+    return numpy.where(valid, numpy.int64(1) << numpy.where(valid, boards, 0), 0)
+
+
+def _units(bits):
+    """Return the bits of the cells of each row, column and square of the boards, as arrays indexed
+    by board, unit and cell of the unit.
+    """
+    count, size = bits.shape[:2]
+    values_per_square = int(round(size ** 0.5))
+    squares = bits.reshape(
+        count, values_per_square, values_per_square, values_per_square, values_per_square,
+    ).transpose(0, 1, 3, 2, 4).reshape(count, size, size)
+    return bits, bits.transpose(0, 2, 1), squares
+
+
+def _used(units):
+    """Return the masks of the values used by each unit, and of the values used more than once."""
+    used = numpy.zeros(units.shape[:2], dtype=numpy.int64)
+    repeated = numpy.zeros(units.shape[:2], dtype=numpy.int64)
+    for cell in range(units.shape[2]):
+        repeated |= used & units[..., cell]
+        used |= units[..., cell]
+    return used, repeated
+
+
+def _correct(boards):
+    size = boards.shape[1]
+    all_values = (1 << size + 1) - 2
+    result = ((boards > 0) & (boards <= size)).all(axis=(1, 2))
+    for units in _units(_bits(boards)):
+        used, _ = _used(units)
+        result &= (used == all_values).all(axis=1)
+    return result
+
+
+def _conflicting(boards):
+    result = numpy.zeros(len(boards), dtype=bool)
+    for units in _units(_bits(boards)):
+        _, repeated = _used(units)
+        result |= (repeated != 0).any(axis=1)
+    return result
+
+
+def _candidate_masks(boards):
+    count, size = boards.shape[:2]
+    values_per_square = int(round(size ** 0.5))
+    bits = _bits(boards)
+    rows, columns, squares = [_used(units) for units in _units(bits)]
+
+    def per_cell(masks):
+        rows_masks, columns_masks, squares_masks = masks
+        squares_masks = squares_masks.reshape(count, values_per_square, values_per_square)
+        squares_masks = squares_masks.repeat(values_per_square, 1).repeat(values_per_square, 2)
+        return rows_masks[:, :, numpy.newaxis] | columns_masks[:, numpy.newaxis] | squares_masks
+
+    # The value of a cell is still possible if no other cell of its units contains it
+    used = per_cell([rows[0], columns[0], squares[0]])
+    repeated = per_cell([rows[1], columns[1], squares[1]])
+    used = used & ~bits | repeated & bits
+    return ((1 << size + 1) - 2) & ~used
+
+
+def _candidate_counts(boards):
+    masks = _candidate_masks(boards)
+    counts = numpy.zeros(masks.shape, dtype=numpy.int64)
+    for value in range(1, boards.shape[1] + 1):
+        counts += masks >> value & 1
+    return counts